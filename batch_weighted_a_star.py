@@ -1,34 +1,89 @@
-from game  import *
-from heapq import *
+from game              import *
+from heapq             import *
+from pathlib           import *
+from profiling         import *
+from search_checkpoint import *
+from time              import *
+from visited_states    import *
 
 
-def get_answer(initial_state, cost_model, n, l):
-    def get_next_state_and_next_answers():
-        for _ in range(min(n, len(queue))):
-            _, state, answer = heappop(queue)
+# max_visited_state_sizeを指定すると、訪問済みの状態がその数を超えた時点でディスクにはき出します。
+# キューには、状態をpack_states()で詰めた16バイトのキーと、手順をACTIONSのインデックスを並べたbytesにして入れます（1要素200バイト程度）。
+# キューはメモリ上に置いたままなので、使えるメモリの上限は、キューの大きさ（＝展開した状態の数）で決まります。
 
-            for action in ACTIONS.keys():
-                next_state  = get_next_state(state, action)
-                next_answer = answer + (action,)
+_ACTION_NAMES = tuple(ACTIONS.keys())
+_ACTION_BYTES = tuple(bytes((i,)) for i in range(len(_ACTION_NAMES)))
+_GOAL_KEY     = pack_states((GOAL_STATE,))[0]
 
-                if next_state not in visited_states or visited_states[next_state] > len(next_answer):
-                    visited_states[next_state] = len(next_answer)
 
-                    yield next_state, next_answer
+def get_answer(initial_state, cost_model, n, l, checkpoint_path=None, checkpoint_interval=600, max_visited_state_size=None):  # checkpoint_intervalは秒。
+    def get_next_states_and_next_keys_and_next_answers():
+        keys, answers = zip(*(heappop(queue)[1:] for _ in range(min(n, len(queue)))))
 
-    queue = [(0, initial_state, ())]
-    visited_states = {initial_state: 0}
+        states = unpack_keys(keys)
+
+        next_states  = np.stack(tuple(get_next_states(states, action) for action in _ACTION_NAMES), axis=1).reshape(-1, len(GOAL_STATE))
+        next_keys    = pack_states(next_states)
+        next_answers = tuple(answer + action for answer in answers for action in _ACTION_BYTES)
+
+        next_costs = {}  # バッチ内で重複した状態の扱いを、1つずつ調べていた頃と同じにするためのものです。
+        indexes    = []
+
+        for i, (next_key, next_answer, cost) in enumerate(zip(next_keys, next_answers, visited_states.get_costs(next_keys).tolist())):
+            if next_costs.get(next_key, cost) > len(next_answer):
+                next_costs[next_key] = len(next_answer)
+                indexes.append(i)
+
+        visited_states.update(next_costs)
+
+        return next_states[indexes], tuple(next_keys[i] for i in indexes), tuple(next_answers[i] for i in indexes)
+
+    visited_states = VisitedStates(max_visited_state_size)
+
+    if checkpoint_path and Path(checkpoint_path).exists():
+        queue, stats = load_checkpoint(checkpoint_path, initial_state, visited_states)
+    else:
+        initial_key = pack_states((initial_state,))[0]
+
+        queue = [(0, initial_key, b'')]
+        visited_states.update({initial_key: 0})
+        stats = {'iteration': 0, 'expanded_node_size': 0, 'elapsed_time': 0.0}
+
+    starting_time   = time() - stats['elapsed_time']
+    checkpoint_time = time()
 
     while queue:
-        next_states, next_answers = zip(*get_next_state_and_next_answers())
+        stats['expanded_node_size'] += min(n, len(queue))
+
+        with trace('expand'):
+            next_states, next_keys, next_answers = get_next_states_and_next_keys_and_next_answers()
+
+        if _GOAL_KEY in next_keys:
+            if checkpoint_path:
+                Path(checkpoint_path).unlink(missing_ok=True)
+
+            return tuple(_ACTION_NAMES[i] for i in next_answers[next_keys.index(_GOAL_KEY)])
+
+        if next_keys:
+            with trace('encode'):
+                xs = get_xs(next_states)
+
+            with trace('infer'):
+                cost_to_goals = cost_model.predict(xs, batch_size=10000).flatten().tolist()
+
+            with trace('push'):
+                for next_key, next_answer, cost_to_goal in zip(next_keys, next_answers, cost_to_goals):
+                    heappush(queue, (l * len(next_answer) + cost_to_goal, next_key, next_answer))
+
+        stats['iteration'] += 1
 
-        for next_state, next_answer in zip(next_states, next_answers):
-            if next_state == GOAL_STATE:
-                return next_answer
+        if checkpoint_path and time() - checkpoint_time >= checkpoint_interval:
+            with trace('checkpoint'):
+                stats['elapsed_time'] = time() - starting_time
+                save_checkpoint(checkpoint_path, initial_state, queue, visited_states, stats)
 
-        cost_to_goals = cost_model.predict(np.array(tuple(map(get_x, next_states))), batch_size=10000).flatten()
+            checkpoint_time = time()
 
-        for next_state, next_answer, cost_to_goal in zip(next_states, next_answers, cost_to_goals):
-            heappush(queue, (l * len(next_answer) + cost_to_goal, next_state, next_answer))
+        record_memory()
 
     return ()
@@ -1,5 +1,6 @@
-from game  import *
-from heapq import *
+from game      import *
+from heapq     import *
+from profiling import *
 
 
 def get_answer(initial_state, cost_model, n):
@@ -22,17 +23,25 @@ def get_answer(initial_state, cost_model, n):
     while queue:
         next_queue = []
 
-        next_states, next_answers = zip(*get_next_state_and_next_answers())
+        with trace('expand'):
+            next_states, next_answers = zip(*get_next_state_and_next_answers())
 
         for next_state, next_answer in zip(next_states, next_answers):
             if next_state == GOAL_STATE:
                 return next_answer
 
-        cost_to_goals = cost_model.predict(np.array(tuple(map(get_x, next_states))), batch_size=10000).flatten()
+        with trace('encode'):
+            xs = np.array(tuple(map(get_x, next_states)))
 
-        for next_state, next_answer, cost_to_goal in zip(next_states, next_answers, cost_to_goals):
-            heappush(next_queue, (cost_to_goal, next_state, next_answer))
+        with trace('infer'):
+            cost_to_goals = cost_model.predict(xs, batch_size=10000).flatten()
+
+        with trace('push'):
+            for next_state, next_answer, cost_to_goal in zip(next_states, next_answers, cost_to_goals):
+                heappush(next_queue, (cost_to_goal, next_state, next_answer))
 
         queue = next_queue
 
+        record_memory()
+
     return ()
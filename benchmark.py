@@ -0,0 +1,159 @@
+import argparse
+import batch_weighted_a_star
+import beam_search
+import json
+import sys
+import tensorflow as tf
+import tracemalloc
+
+from game                import *
+from inference_scheduler import *
+from pathlib             import *
+from random              import *
+from time                import *
+
+
+# 再現可能なソルバーのベンチマークです。手数ごとの難易度の段階（それぞれ固定のシードで10問）と既知の難問を、
+# Batch Weighted A*とビーム・サーチで解いて、時間、評価した状態数、predict()の回数、ピーク・メモリ、解答の手数を記録します。
+# 結果はベースラインと比較して、閾値を超えて悪くなっていたら終了コード1で終了します。
+#
+# python benchmark.py [--save-baseline] [-n 100] [-l 0.2] [--max-time 120] [--max-predict-count 10000]
+#
+# 1回の探索がmax_time秒かmax_predict_count回のpredict()を超えたら打ち切って、失敗として報告します（終了コードは1になります）。
+# tracemallocでメモリを計測しているので、時間は計測しない場合より長くなります（ベースラインも同じ条件なので比較はできます）。
+
+TIERS = {'easy':   8,
+         'medium': 16,
+         'hard':   24,
+         'random': 32}
+
+HARD_PROBLEMS = {'26-moves':   "U U F U U R' L F F U F' B' R L U U R U D' R L' D R' L' D D",  # solve_hardest_problem.pyの問題。
+                 '25-moves-1': "U U F U U R' L F F U F' B' R L U U R U D' R L' D R' L' D'",
+                 '25-moves-2': "U F U U R' L F F U F' B' R L U U L U D' R' L D R' L' U U",
+                 'superflip':  "U R R F B R B B R U U L B B R U' D' R R F R' L B B U U F F"}  # 90度単位の最短は24手ですが、これは28手。
+
+THRESHOLDS = {'time':           1.25,
+              'predicted_size': 1.10,
+              'predict_count':  1.10,
+              'peak_memory':    1.25,
+              'steps':          1.05}
+
+
+class _LimitExceeded(Exception):
+    pass
+
+
+class _LimitedCostModel(CountingCostModel):  # 制限を超えたら、predict()で例外を投げて探索を打ち切ります。
+    def __init__(self, cost_model, max_time, max_predict_count):
+        super().__init__(cost_model)
+
+        self.deadline          = time() + max_time if max_time else None
+        self.max_predict_count = max_predict_count
+
+    def predict(self, xs, batch_size=None):
+        if self.deadline and time() > self.deadline:
+            raise _LimitExceeded('time')
+
+        if self.max_predict_count and self.predict_count >= self.max_predict_count:
+            raise _LimitExceeded('predict_count')
+
+        return super().predict(xs, batch_size=batch_size)
+
+
+def get_problems(problem_size=10):
+    for tier, step in TIERS.items():
+        seed(step)
+
+        for i in range(problem_size):
+            yield f'{tier}-{i}', get_random_state(step)[0]
+
+    for name, question in HARD_PROBLEMS.items():
+        state = GOAL_STATE
+
+        for action in question.split():
+            state = get_next_state(state, action)
+
+        yield name, state
+
+
+def run(state, cost_model, algorithm, n, l, max_time=None, max_predict_count=None):
+    counting_cost_model = _LimitedCostModel(cost_model, max_time, max_predict_count)
+    limit_exceeded      = None
+
+    tracemalloc.start()
+    starting_time = time()
+
+    try:
+        answer = batch_weighted_a_star.get_answer(state, counting_cost_model, n, l) if algorithm == 'batch_weighted_a_star' else beam_search.get_answer(state, counting_cost_model, n)
+    except _LimitExceeded as e:
+        answer         = ()
+        limit_exceeded = str(e)
+
+    result = {'time':           time() - starting_time,
+              'predicted_size': counting_cost_model.predicted_size,
+              'predict_count':  counting_cost_model.predict_count,
+              'peak_memory':    tracemalloc.get_traced_memory()[1],
+              'steps':          len(answer),
+              'limit_exceeded': limit_exceeded}
+
+    tracemalloc.stop()
+
+    return result
+
+
+def get_regressions(results, baseline):
+    for key, result in results.items():
+        if key not in baseline:
+            continue
+
+        for metric, threshold in THRESHOLDS.items():
+            if result[metric] > max(baseline[key][metric], 1) * threshold:
+                yield key, metric, baseline[key][metric], result[metric]
+
+
+def main(save_baseline=False, n=100, l=0.2, max_time=120, max_predict_count=None, baseline_path=Path('./temp/benchmark-baseline.json')):
+    model = tf.keras.models.load_model('model/cost.h5')
+    model.predict(np.array((get_x(GOAL_STATE),)))  # グラフの構築の時間を含めないようにします。
+
+    results = {}
+
+    for name, state in get_problems():
+        for algorithm in ('batch_weighted_a_star', 'beam_search'):
+            key = f'{name}/{algorithm}/{n}/{l}'
+
+            results[key] = result = run(state, model, algorithm, n, l, max_time, max_predict_count)
+
+            print(f'{key:<48}\t{result["steps"]:3d} steps\t{result["time"]:8.3f} seconds\t{result["predicted_size"]:9d} states\t{result["predict_count"]:5d} predicts\t{result["peak_memory"] / 1024 / 1024:8.1f} MB')
+
+    tf.keras.backend.clear_session()
+
+    failures = tuple((key, result['limit_exceeded']) for key, result in results.items() if result['limit_exceeded'])
+
+    for key, limit in failures:
+        print(f'FAILURE: {key} exceeded the {limit} limit')
+
+    if save_baseline:
+        baseline_path.parent.mkdir(exist_ok=True)
+        baseline_path.write_text(json.dumps(results, indent=2))
+
+        return 1 if failures else 0
+
+    regressions = tuple(get_regressions(results, json.loads(baseline_path.read_text()) if baseline_path.exists() else {}))
+
+    for key, metric, baseline_value, value in regressions:
+        print(f'REGRESSION: {key} {metric}: {baseline_value} -> {value}')
+
+    return 1 if regressions or failures else 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('-n', type=int, default=100)
+    parser.add_argument('-l', type=float, default=0.2)
+    parser.add_argument('--max-time', type=float, default=120)
+    parser.add_argument('--max-predict-count', type=int)
+
+    args = parser.parse_args()
+
+    sys.exit(main(args.save_baseline, args.n, args.l, args.max_time, args.max_predict_count))
@@ -1,27 +1,91 @@
-import numpy      as np
-import tensorflow as tf
+import numpy as np
+import os
 
-from funcy   import *
-from game    import *
-from pathlib import *
+from concurrent.futures import *
+from funcy              import *
+from game               import *
+from pathlib            import *
+from random             import *
 
 
-def main():
-    path = Path('./model')
+# 学習途中のモデルを、共通の評価用データ（各手数1,000問）で並列に評価して、結果をtemp/train-result.npzに保存します。
+# 結果は、visualize_train_result.pyで可視化できます。
 
-    for model_path in path.glob('cost-1024x4-1000x1000*.h5'):
-        model = tf.keras.models.load_model(model_path)
 
-        seed(0)
+def get_evaluation_set(path=Path('./temp/evaluation-set.npz'), size=1000):
+    if path.exists():
+        with np.load(path) as data:
+            return data['states'], data['steps']
 
-        for y_true in range(1, 32):
-            for y_pred in model.predict(np.array(tuple(repeatedly(lambda: get_x(get_random_state(y_true)[0]), 1000))), 1000).flatten():
-                print(f'{model_path.stem}\t{y_true}\t{y_pred}')
+    seed(0)
 
-        tf.keras.backend.clear_session()
+    steps  = np.repeat(np.arange(1, 32, dtype=np.uint8), size)
+    states = np.array(tuple(get_random_state(step)[0] for step in steps), dtype=np.uint8)
 
     seed()
 
+    path.parent.mkdir(exist_ok=True)
+    np.savez_compressed(path, states=states, steps=steps)
+
+    return states, steps
+
+
+def predict(model_path, states, thread_size):  # 子プロセスで実行されます。
+    import tensorflow as tf
+
+    tf.config.threading.set_intra_op_parallelism_threads(thread_size)
+
+    model  = tf.keras.models.load_model(model_path)
+    result = np.concatenate(tuple(model.predict(get_xs(chunk), batch_size=1000).flatten() for chunk in np.array_split(states, max(len(states) // 10000, 1))))
+
+    tf.keras.backend.clear_session()
+
+    return result.astype(np.float32)
+
+
+def get_statistics(y_preds, steps):  # 手数ごとの、予測の平均と標準偏差と平均絶対誤差と二乗平均平方根誤差。
+    depths = np.unique(steps)
+    errors = y_preds - steps
+
+    return (depths,
+            np.stack(tuple(np.mean(y_preds[:, steps == depth], axis=1)                 for depth in depths), axis=1),
+            np.stack(tuple(np.std(y_preds[:, steps == depth], axis=1)                  for depth in depths), axis=1),
+            np.stack(tuple(np.mean(np.abs(errors[:, steps == depth]), axis=1)          for depth in depths), axis=1),
+            np.stack(tuple(np.sqrt(np.mean(np.square(errors[:, steps == depth]), axis=1)) for depth in depths), axis=1))
+
+
+def main(max_workers=None):
+    model_paths = sorted(Path('./model').glob('cost-1024x4-1000x1000*.h5'))
+
+    if not model_paths:
+        print('no model/cost-1024x4-1000x1000*.h5. run train_driver.py (or python cli.py train) to save versioned snapshots first.')
+        return
+
+    states, steps = get_evaluation_set()
+
+    max_workers = max(max_workers or min(len(model_paths), 4), 1)  # 1024×4のモデルはメモリを食うので、同時実行数は控えめにします。
+    thread_size = max(os.cpu_count() // max_workers, 1)
+
+    with ProcessPoolExecutor(max_workers) as executor:
+        y_preds = np.array(tuple(executor.map(predict, model_paths, repeat(states), repeat(thread_size))), dtype=np.float32).reshape(len(model_paths), len(states))
+
+    depths, means, stds, maes, rmses = get_statistics(y_preds, steps)
+
+    np.savez_compressed('./temp/train-result.npz',
+                        model_names=np.array(tuple(model_path.stem for model_path in model_paths)),
+                        steps=steps,
+                        y_preds=y_preds,
+                        depths=depths,
+                        means=means,
+                        stds=stds,
+                        maes=maes,
+                        rmses=rmses)
+
+    print('\t'.join(('depth', *(model_path.stem for model_path in model_paths))))
+
+    for depth, depth_means, depth_maes in zip(depths, means.T, maes.T):
+        print('\t'.join((f'{depth}', *(f'{mean:6.2f} ({mae:5.2f})' for mean, mae in zip(depth_means, depth_maes)))))
+
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,185 @@
+import argparse
+import importlib
+import json
+import sys
+
+from time import *
+
+
+# ソルバーや学習などをまとめたコマンドライン・インターフェースです。
+# 重いモジュール（TensorFlow、NumPy、funcy、game）は、サブコマンドが必要になるまでインポートしません。
+#
+# python cli.py solve --question "U U F R'"
+# python cli.py solve --facelets problems.txt  # Kociemba形式の文字列を1行に1つ書いたファイル。解答はU2などを使った形式で出力します。
+# python cli.py solve --random 32 --seed 0 --server http://127.0.0.1:8765  # solver_serverに解かせるなら、TensorFlowのインポートも不要です。
+# python cli.py serve
+# python cli.py bench [--save-baseline] [-n 100] [-l 0.2] [--max-time 120] [--max-predict-count 10000]
+# python cli.py train [--value-iteration] [--mixed-precision] [--hard-examples]
+# python cli.py eval
+#
+# --import-timeを付けると、インポートにかかった時間の内訳を標準エラー出力に出力します。
+
+_import_times = []
+
+
+def _import(name):
+    starting_time = perf_counter()
+    result        = importlib.import_module(name)
+
+    _import_times.append((name, perf_counter() - starting_time))
+
+    return result
+
+
+def _format_actions(actions):
+    return ' '.join(map(lambda action: action if len(action) == 2 else action + ' ', actions))
+
+
+def _get_problems(args):  # 問題は、{'question': 手順}か{'facelets': Kociemba形式の文字列}で表現します。
+    if args.facelets:
+        facelet = _import('facelet')
+
+        with open(args.facelets) as f:
+            facelets = tuple(filter(None, map(str.strip, f)))
+
+        facelet.to_states(facelets)  # 解けない状態が混ざっていたら、探索を始める前にエラーにします。
+
+        return tuple({'facelets': line} for line in facelets)
+
+    if args.question:
+        return ({'question': args.question},)
+
+    random = _import('random')
+    game   = _import('game')
+
+    random.seed(args.seed)
+
+    return tuple({'question': ' '.join(game.get_random_state(args.random)[1])} for _ in range(args.count))
+
+
+def _solve_by_server(args, problems):
+    request = _import('urllib.request')
+
+    for problem in problems:
+        body     = json.dumps({**problem, 'algorithm': args.algorithm, 'n': args.n, 'l': args.l}).encode()
+        response = json.loads(request.urlopen(request.Request(f'{args.server}/solve', body, {'Content-Type': 'application/json'})).read())
+
+        yield problem, response['answer'], response['time']
+
+
+def _solve_locally(args, problems):
+    tf      = _import('tensorflow')
+    game    = _import('game')
+    facelet = _import('facelet')
+    search  = _import(args.algorithm)
+
+    model = tf.keras.models.load_model(args.model)
+
+    for problem in problems:
+        if 'facelets' in problem:
+            state = tuple(facelet.to_states(problem['facelets'])[0])
+        else:
+            state = game.GOAL_STATE
+
+            for action in problem['question'].split():
+                state = game.get_next_state(state, action)
+
+        starting_time = time()
+
+        if state == game.GOAL_STATE:  # 探索はゴールを子の中からしか見つけないので、解けている状態は探索しません。
+            answer = ()
+        else:
+            answer = search.get_answer(state, model, args.n, args.l) if args.algorithm == 'batch_weighted_a_star' else search.get_answer(state, model, args.n)
+
+        yield problem, answer, time() - starting_time
+
+
+def solve(args):
+    problems = _get_problems(args)
+
+    for problem, answer, solving_time in (_solve_by_server if args.server else _solve_locally)(args, problems):
+        print(f'{len(answer)} steps, {solving_time:6.3f} seconds')
+
+        if 'facelets' in problem:
+            print(problem['facelets'])
+            print(' '.join(_import('facelet').to_moves(answer)))
+        else:
+            print(_format_actions(problem['question'].split()))
+            print(_format_actions(answer))
+
+
+def serve(args):
+    _import('solver_server').main(args.host, args.port)
+
+
+def bench(args):
+    return _import('benchmark').main(args.save_baseline, args.n, args.l, args.max_time, args.max_predict_count)
+
+
+def train(args):
+    _import('train_driver').main(args.value_iteration, args.mixed_precision, hard_examples=args.hard_examples)
+
+
+def evaluate(args):
+    _import('check_train_result').main(args.max_workers)
+
+
+def create_parser():
+    result     = argparse.ArgumentParser(prog='cli.py')
+    subparsers = result.add_subparsers(dest='command', required=True)
+
+    result.add_argument('--import-time', action='store_true', help='print the import time breakdown to stderr')
+
+    solve_parser = subparsers.add_parser('solve')
+    solve_parser.add_argument('--question', help="scramble such as \"U U F R'\"")
+    solve_parser.add_argument('--facelets', help='file of 54-character Kociemba facelet strings, one per line')
+    solve_parser.add_argument('--random', type=int, default=32, help='scramble length of random questions')
+    solve_parser.add_argument('--count', type=int, default=1)
+    solve_parser.add_argument('--seed', type=int)
+    solve_parser.add_argument('--algorithm', choices=('batch_weighted_a_star', 'beam_search'), default='batch_weighted_a_star')
+    solve_parser.add_argument('-n', type=int, default=100)
+    solve_parser.add_argument('-l', type=float, default=0.2)
+    solve_parser.add_argument('--model', default='model/cost.h5')
+    solve_parser.add_argument('--server', help='URL of a running solver_server, such as http://127.0.0.1:8765')
+    solve_parser.set_defaults(function=solve)
+
+    serve_parser = subparsers.add_parser('serve')
+    serve_parser.add_argument('--host', default='127.0.0.1')
+    serve_parser.add_argument('--port', type=int, default=8765)
+    serve_parser.set_defaults(function=serve)
+
+    bench_parser = subparsers.add_parser('bench')
+    bench_parser.add_argument('--save-baseline', action='store_true')
+    bench_parser.add_argument('-n', type=int, default=100)
+    bench_parser.add_argument('-l', type=float, default=0.2)
+    bench_parser.add_argument('--max-time', type=float, default=120)
+    bench_parser.add_argument('--max-predict-count', type=int)
+    bench_parser.set_defaults(function=bench)
+
+    train_parser = subparsers.add_parser('train')
+    train_parser.add_argument('--value-iteration', action='store_true')
+    train_parser.add_argument('--mixed-precision', action='store_true')
+    train_parser.add_argument('--hard-examples', action='store_true')
+    train_parser.set_defaults(function=train)
+
+    eval_parser = subparsers.add_parser('eval')
+    eval_parser.add_argument('--max-workers', type=int)
+    eval_parser.set_defaults(function=evaluate)
+
+    return result
+
+
+def main(argv=None):
+    args = create_parser().parse_args(argv)
+
+    try:
+        return args.function(args) or 0
+
+    finally:
+        if args.import_time:
+            for name, import_time in _import_times:
+                print(f'{name:<32}\t{import_time * 1000:9.1f} ms', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,164 @@
+# cube_state.py
+
+from typing import Dict, List, Tuple
+
+# Ursinaに依存しない、ルービックキューブの論理的な状態です。
+# CubeStateReaderと同じ順序（U, R, F, D, L, Bの各面9枚）のステッカーの色を配列で保持し、
+# 回転ごとに事前計算した置換表を適用するだけなので、描画なし（ヘッドレス）でも毎秒数万手を適用できます。
+
+Position = Tuple[int, int, int]
+
+FACE_ORDER = ('U', 'R', 'F', 'D', 'L', 'B')
+
+FACE_NORMALS: Dict[str, Position] = {
+    'U': (0, 1, 0),
+    'R': (1, 0, 0),
+    'F': (0, 0, -1),
+    'D': (0, -1, 0),
+    'L': (-1, 0, 0),
+    'B': (0, 0, 1)
+}
+
+# Kociemba表記のステッカー位置座標 (各面9つのキューブレット)
+STICKER_POSITIONS: Dict[str, Tuple[Position, ...]] = {
+    'U': ((1, 1, -1), (-1, 1, -1), (-1, 1, 1), (1, 1, 1),
+          (0, 1, -1), (-1, 1, 0), (0, 1, 1), (1, 1, 0),
+          (0, 1, 0)),
+    'R': ((1, 1, -1), (1, 1, 1), (1, -1, 1), (1, -1, -1),
+          (1, 0, -1), (1, 0, 1), (1, 1, 0), (1, -1, 0),
+          (1, 0, 0)),
+    'F': ((1, 1, -1), (-1, 1, -1), (-1, -1, -1), (1, -1, -1),
+          (1, 0, -1), (0, 1, -1), (-1, 0, -1), (0, -1, -1),
+          (0, 0, -1)),
+    'D': ((-1, -1, -1), (-1, -1, 1), (1, -1, 1), (1, -1, -1),
+          (0, -1, -1), (-1, -1, 0), (0, -1, 1), (1, -1, 0),
+          (0, -1, 0)),
+    'L': ((-1, -1, -1), (-1, -1, 1), (-1, 1, 1), (-1, 1, -1),
+          (-1, 0, -1), (-1, -1, 0), (-1, 0, 1), (-1, 1, 0),
+          (-1, 0, 0)),
+    'B': ((-1, 1, 1), (1, 1, 1), (1, -1, 1), (-1, -1, 1),
+          (-1, 0, 1), (0, 1, 1), (1, 0, 1), (0, -1, 1),
+          (0, 0, 1))
+}
+
+AXES = ('x', 'y', 'z')
+
+# 標準のKociemba形式（各面を外から見て、左上から行ごと）のステッカー位置座標。
+# 上のSTICKER_POSITIONS（CubeStateReaderの順序。コーナー、エッジ、センターの順）とは並びが違います。
+KOCIEMBA_POSITIONS: Dict[str, Tuple[Position, ...]] = {
+    face_char: tuple(get_position(row, column) for row in range(3) for column in range(3))
+    for face_char, get_position in (('U', lambda row, column: (column - 1, 1, 1 - row)),
+                                    ('R', lambda row, column: (1, 1 - row, column - 1)),
+                                    ('F', lambda row, column: (column - 1, 1 - row, -1)),
+                                    ('D', lambda row, column: (column - 1, -1, row - 1)),
+                                    ('L', lambda row, column: (-1, 1 - row, 1 - column)),
+                                    ('B', lambda row, column: (1 - column, 1 - row, 1)))
+}
+
+# Kociemba形式の各位置の、CubeStateReaderの順序でのインデックス。
+_APP_INDEXES = [[(face_char, position) for face_char in FACE_ORDER for position in STICKER_POSITIONS[face_char]].index((face_char, position))
+                for face_char in FACE_ORDER for position in KOCIEMBA_POSITIONS[face_char]]
+
+# RubiksCube.MOVE_MAPのD、L、Bは、標準の記法とは逆回りです（D = 標準のD'）。
+_STANDARD_TO_APP_MOVES = {
+    'U': 'U', 'U\'': 'U\'', 'R': 'R', 'R\'': 'R\'', 'F': 'F', 'F\'': 'F\'',
+    'D': 'D\'', 'D\'': 'D', 'L': 'L\'', 'L\'': 'L', 'B': 'B\'', 'B\'': 'B'
+}
+
+
+def rotate(vector: Position, axis: str, degrees: int) -> Position:
+    """Ursinaのrotation_x/y/zと同じ向き（軸の正の側から見て時計回りが正）で、ベクトルを90度単位で回転する."""
+    x, y, z = vector
+
+    for _ in range((round(degrees / 90)) % 4):
+        if axis == 'x':
+            x, y, z = x, -z, y
+        elif axis == 'y':
+            x, y, z = z, y, -x
+        else:
+            x, y, z = y, -x, z
+
+    return (x, y, z)
+
+
+def to_kociemba_facelets(state: str) -> str:
+    """CubeStateReaderの順序の状態文字列を、標準のKociemba形式（facelet.pyやKociembaソルバーの入力）に並べ替える."""
+    return ''.join(state[i] for i in _APP_INDEXES)
+
+
+def from_kociemba_facelets(facelets: str) -> str:
+    """標準のKociemba形式の文字列を、CubeStateReaderの順序に並べ替える."""
+    result = [''] * len(_APP_INDEXES)
+    for facelet, i in zip(facelets, _APP_INDEXES):
+        result[i] = facelet
+    return ''.join(result)
+
+
+def to_app_moves(moves: List[str]) -> List[str]:
+    """標準の記法の手順（U2などを含む）を、RubiksCube.MOVE_MAPの90度の回転に変換する."""
+    result = []
+    for move in moves:
+        if move.endswith('2'):
+            result.extend([_STANDARD_TO_APP_MOVES[move[:-1]]] * 2)
+        else:
+            result.append(_STANDARD_TO_APP_MOVES[move])
+    return result
+
+
+def get_layer_positions(axis: str, layer: int) -> List[Position]:
+    index = AXES.index(axis)
+
+    return [(x, y, z) for x in range(-1, 2) for y in range(-1, 2) for z in range(-1, 2)
+            if (x, y, z) != (0, 0, 0) and (x, y, z)[index] == layer]
+
+
+class LogicalCube:
+    def __init__(self, move_map: Dict[str, Tuple[str, int, int]]):
+        self.move_map = move_map
+
+        # (キューブレットの位置, 面の法線) -> ステッカーのインデックス
+        self.sticker_indexes: Dict[Tuple[Position, Position], int] = {}
+        for face_char in FACE_ORDER:
+            for position in STICKER_POSITIONS[face_char]:
+                self.sticker_indexes[(position, FACE_NORMALS[face_char])] = len(self.sticker_indexes)
+
+        # 回転ごとの置換表。新しい状態[i] = 古い状態[table[i]]
+        self.move_tables: Dict[str, List[int]] = {}
+        # 回転ごとの、キューブレットの移動先。
+        self.position_tables: Dict[str, Dict[Position, Position]] = {}
+        # 回転の対象のレイヤーの位置。
+        self.layer_positions: Dict[Tuple[str, int], List[Position]] = {
+            (axis, layer): get_layer_positions(axis, layer) for axis in AXES for layer in (-1, 0, 1)
+        }
+
+        for move, (axis, layer, degrees) in move_map.items():
+            table = list(range(len(self.sticker_indexes)))
+            for (position, normal), index in self.sticker_indexes.items():
+                if position[AXES.index(axis)] == layer:
+                    table[self.sticker_indexes[(rotate(position, axis, degrees), rotate(normal, axis, degrees))]] = index
+            self.move_tables[move] = table
+
+            self.position_tables[move] = {
+                position: rotate(position, axis, degrees) for position in self.layer_positions[(axis, layer)]
+            }
+
+        self.reset()
+
+    def reset(self):
+        self.state: List[str] = [face_char for face_char in FACE_ORDER for _ in range(9)]
+
+    def apply_move(self, move: str):
+        state = self.state
+        self.state = [state[i] for i in self.move_tables[move]]
+
+    def apply_moves(self, moves: List[str]):
+        for move in moves:
+            self.apply_move(move)
+
+    def get_state(self) -> str:
+        """CubeStateReader.get_stateと同じ形式の状態文字列を返す."""
+        return ''.join(self.state)
+
+    def get_kociemba_state(self) -> str:
+        """標準のKociemba形式の状態文字列を返す."""
+        return to_kociemba_facelets(self.get_state())
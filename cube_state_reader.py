@@ -4,52 +4,23 @@ from ursina import Entity, Vec3, Color, color
 import math
 from typing import Dict, List, Optional
 
+from cube_state import FACE_NORMALS, STICKER_POSITIONS
+
 class CubeStateReader:
     def __init__(self, cube_colors: Dict[str, Color]):
         self.CUBE_COLORS = cube_colors
         self.COLOR_TO_CHAR = {v: k for k, v in self.CUBE_COLORS.items()}
 
-        self.face_normals = {
-            'U': Vec3(0, 1, 0),    
-            'R': Vec3(1, 0, 0),    
-            'F': Vec3(0, 0, -1),   
-            'D': Vec3(0, -1, 0),   
-            'L': Vec3(-1, 0, 0),  
-            'B': Vec3(0, 0, 1)     
-        }
+        self.face_normals = {face_char: Vec3(*normal) for face_char, normal in FACE_NORMALS.items()}
 
         # Kociemba表記のステッカー位置座標 (各面9つのキューブレット)
-        # これらは静的なデータなので、クラスのインスタンス変数として保持
-        self.Kociemba_U_order_coords = [
-            Vec3(1,1,-1), Vec3(-1,1,-1), Vec3(-1,1,1), Vec3(1,1,1), 
-            Vec3(0,1,-1), Vec3(-1,1,0), Vec3(0,1,1), Vec3(1,1,0),  
-            Vec3(0,1,0)                                           
-        ]
-        self.Kociemba_R_order_coords = [
-            Vec3(1,1,-1), Vec3(1,1,1), Vec3(1,-1,1), Vec3(1,-1,-1), 
-            Vec3(1,0,-1), Vec3(1,0,1), Vec3(1,1,0), Vec3(1,-1,0),  
-            Vec3(1,0,0)                                            
-        ]
-        self.Kociemba_F_order_coords = [
-            Vec3(1,1,-1), Vec3(-1,1,-1), Vec3(-1,-1,-1), Vec3(1,-1,-1), 
-            Vec3(1,0,-1), Vec3(0,1,-1), Vec3(-1,0,-1), Vec3(0,-1,-1),   
-            Vec3(0,0,-1)                                               
-        ]
-        self.Kociemba_D_order_coords = [
-            Vec3(-1,-1,-1), Vec3(-1,-1,1), Vec3(1,-1,1), Vec3(1,-1,-1), 
-            Vec3(0,-1,-1), Vec3(-1,-1,0), Vec3(0,-1,1), Vec3(1,-1,0),  
-            Vec3(0,-1,0)                                              
-        ]
-        self.Kociemba_L_order_coords = [
-            Vec3(-1,-1,-1), Vec3(-1,-1,1), Vec3(-1,1,1), Vec3(-1,1,-1), 
-            Vec3(-1,0,-1), Vec3(-1,-1,0), Vec3(-1,0,1), Vec3(-1,1,0),  
-            Vec3(-1,0,0)                                              
-        ]
-        self.Kociemba_B_order_coords = [
-            Vec3(-1,1,1), Vec3(1,1,1), Vec3(1,-1,1), Vec3(-1,-1,1), 
-            Vec3(-1,0,1), Vec3(0,1,1), Vec3(1,0,1), Vec3(0,-1,1),  
-            Vec3(0,0,1)                                            
-        ]
+        # これらは静的なデータなので、クラスのインスタンス変数として保持 (座標はcube_state.LogicalCubeと共有)
+        self.Kociemba_U_order_coords = [Vec3(*p) for p in STICKER_POSITIONS['U']]
+        self.Kociemba_R_order_coords = [Vec3(*p) for p in STICKER_POSITIONS['R']]
+        self.Kociemba_F_order_coords = [Vec3(*p) for p in STICKER_POSITIONS['F']]
+        self.Kociemba_D_order_coords = [Vec3(*p) for p in STICKER_POSITIONS['D']]
+        self.Kociemba_L_order_coords = [Vec3(*p) for p in STICKER_POSITIONS['L']]
+        self.Kociemba_B_order_coords = [Vec3(*p) for p in STICKER_POSITIONS['B']]
 
         self.all_face_sticker_positions_kociemba_order = {
             'U': self.Kociemba_U_order_coords,
@@ -0,0 +1,113 @@
+import batch_weighted_a_star
+import sys
+import tensorflow as tf
+
+from funcy   import *
+from game    import *
+from pathlib import *
+from random  import *
+from time    import *
+from train   import computational_graph
+
+
+# model/cost.h5（1024×4の残差ネットワーク）を先生にして、小さくて速い生徒のモデルを蒸留します。
+# 生徒は、幅と深さを減らした同じ形の残差ネットワーク（resnet）か、48枚のシールのone-hotを平らにした入力のMLP（mlp）です。
+#
+# python distill.py resnet 128 2
+# python distill.py mlp 1024 3
+
+
+def mlp_computational_graph(width, height):
+    def dense(unit_size):
+        return tf.keras.layers.Dense(unit_size, kernel_initializer='he_normal')
+
+    def relu():
+        return tf.keras.layers.ReLU()
+
+    return rcompose(tf.keras.layers.Flatten(),
+                    rcompose(*repeatedly(lambda: rcompose(dense(width), relu()), height)),
+                    dense(1),
+                    relu())
+
+
+def create_model(kind, width, height):
+    result = tf.keras.Model(*juxt(identity, (computational_graph if kind == 'resnet' else mlp_computational_graph)(width, height))(tf.keras.Input(shape=(3, 3, 6 * 6))))
+
+    result.compile(optimizer='adam', loss='mean_squared_error', metrics=['mean_absolute_error'])
+    result.summary()
+
+    return result
+
+
+def create_generator(teacher_model, batch_size):  # 正解は、先生の予測です。
+    while True:
+        xs = get_xs(tuple(get_random_state(randrange(1, 32))[0] for _ in range(batch_size)))
+
+        yield xs, teacher_model.predict(xs, batch_size=batch_size).flatten()
+
+
+def get_accuracy(model, teacher_model):
+    seed(0)
+
+    steps = np.repeat(np.arange(1, 32), 100)
+    xs    = get_xs(tuple(get_random_state(step)[0] for step in steps))
+
+    y_pred = model.predict(xs, batch_size=10000).flatten()
+
+    return np.mean(np.abs(y_pred - teacher_model.predict(xs, batch_size=10000).flatten())), np.mean(np.abs(y_pred - steps))
+
+
+def get_latency(model):  # 探索でのpredict()と同じ、10,000件をまとめて予測するのにかかる時間です。
+    xs = get_xs(tuple(get_random_state(randrange(1, 32))[0] for _ in range(10000)))
+
+    model.predict(xs, batch_size=10000)
+
+    starting_time = time()
+
+    for _ in range(10):
+        model.predict(xs, batch_size=10000)
+
+    return (time() - starting_time) / 10
+
+
+def get_solve_result(model):  # solve.pyと同じ問題を、solve.pyと同じパラメーターで解きます。
+    seed(0)
+
+    times   = []
+    lengths = []
+
+    for _ in range(10):
+        state, _ = get_random_state(32)
+
+        starting_time = time()
+        answer = batch_weighted_a_star.get_answer(state, model, 100, 0.2)
+
+        times.append(time() - starting_time)
+        lengths.append(len(answer))
+
+    return np.mean(times), np.mean(lengths)
+
+
+def main(kind='resnet', width=128, height=2, epochs=10):
+    teacher_model = tf.keras.models.load_model('model/cost.h5')
+    model         = create_model(kind, width, height)
+
+    model.fit_generator(create_generator(teacher_model, 1000), steps_per_epoch=1000, epochs=epochs)
+
+    model_path = Path(f'./model/cost-student-{kind}-{width}x{height}.h5')
+    tf.keras.models.save_model(model, str(model_path))
+
+    print(f'{"model":<32}\t{"MAE (teacher)":>13}\t{"MAE (steps)":>11}\t{"predict":>9}\t{"solve":>9}\t{"steps":>6}')
+
+    for name, target_model in (('cost', teacher_model), (model_path.stem, model)):
+        teacher_mae, steps_mae = get_accuracy(target_model, teacher_model)
+        latency                = get_latency(target_model)
+        solve_time, length     = get_solve_result(target_model)
+
+        print(f'{name:<32}\t{teacher_mae:13.3f}\t{steps_mae:11.3f}\t{latency:8.3f}s\t{solve_time:8.3f}s\t{length:6.2f}')
+
+    tf.keras.backend.clear_session()
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:2], *map(int, sys.argv[2:5]))
@@ -0,0 +1,139 @@
+import numpy as np
+
+from game import *
+
+
+# Kociemba形式の54文字の文字列（URFDLBの順に各面9枚、色は面の文字）と、game.pyの48要素の状態を相互に変換します。
+# 変換は、NumPyで複数の状態をまとめて実行します。解けない状態（パリティやひねりがおかしいなど）は、探索する前に弾きます。
+#
+# game.pyの色は、F=0、R=1、D=2、B=3、L=4、U=5です。センターは持っていません。
+
+FACES = 'URFDLB'
+
+# Kociemba形式の各位置のステッカーの、game.pyの状態でのインデックス（-1はセンター）。
+_STATE_INDEXES = np.array((40, 41, 42, 47, -1, 43, 46, 45, 44,   # U
+                            8,  9, 10, 15, -1, 11, 14, 13, 12,   # R
+                            0,  1,  2,  7, -1,  3,  6,  5,  4,   # F
+                           22, 23, 16, 21, -1, 17, 20, 19, 18,   # D
+                           34, 35, 36, 33, -1, 37, 32, 39, 38,   # L
+                           26, 27, 28, 25, -1, 29, 24, 31, 30))  # B
+
+_FACELET_INDEXES = np.argsort(_STATE_INDEXES)[-len(GOAL_STATE):]  # game.pyの状態の各インデックスの、Kociemba形式での位置。
+
+_FACE_TO_COLOR = np.array((5, 1, 0, 2, 4, 3))
+_COLOR_TO_FACE = np.argsort(_FACE_TO_COLOR)
+
+_CHAR_TO_FACE = np.full(256, 255, dtype=np.uint8)
+_CHAR_TO_FACE[np.frombuffer(FACES.encode(), dtype=np.uint8)] = np.arange(6)
+
+_U, _R, _F, _D, _L, _B = range(6)
+
+_CORNER_FACELETS = np.array(((8,  9, 20), (6, 18, 38), (0, 36, 47), (2, 45, 11), (29, 26, 15), (27, 44, 24), (33, 53, 42), (35, 17, 51)))
+_CORNER_COLORS   = ((_U, _R, _F), (_U, _F, _L), (_U, _L, _B), (_U, _B, _R), (_D, _F, _R), (_D, _L, _F), (_D, _B, _L), (_D, _R, _B))
+
+_EDGE_FACELETS = np.array(((5, 10), (7, 19), (3, 37), (1, 46), (32, 16), (28, 25), (30, 43), (34, 52), (23, 12), (21, 41), (50, 39), (48, 14)))
+_EDGE_COLORS   = ((_U, _R), (_U, _F), (_U, _L), (_U, _B), (_D, _R), (_D, _F), (_D, _L), (_D, _B), (_F, _R), (_F, _L), (_B, _L), (_B, _R))
+
+# 色の組み合わせから、キューブレットの番号を引く表（-1は存在しない組み合わせ）。
+_CORNER_TABLE = np.full(6 * 6 * 6, -1)
+_CORNER_TABLE[[c0 * 36 + c1 * 6 + c2 for c0, c1, c2 in _CORNER_COLORS]] = np.arange(8)
+
+_EDGE_TABLE = np.full(6 * 6, -1)
+_EDGE_TABLE[[c0 * 6 + c1 for c0, c1 in _EDGE_COLORS]] = np.arange(12)
+
+_EDGE_FLIPPED_TABLE = np.full(6 * 6, -1)
+_EDGE_FLIPPED_TABLE[[c1 * 6 + c0 for c0, c1 in _EDGE_COLORS]] = np.arange(12)
+
+
+def _to_faces(facelets):
+    if isinstance(facelets, str):
+        facelets = (facelets,)
+
+    if any(len(facelet) != 54 for facelet in facelets):
+        raise ValueError('facelets must be 54 characters.')
+
+    return _CHAR_TO_FACE[np.frombuffer(''.join(facelets).encode('ascii', 'replace'), dtype=np.uint8).reshape(-1, 54)]
+
+
+def _get_parities(permutations):
+    return np.sum(np.triu(permutations[:, :, np.newaxis] > permutations[:, np.newaxis, :]), axis=(1, 2)) % 2
+
+
+def get_errors(facelets):
+    """Kociemba形式の文字列それぞれについて、解けない理由（解ける場合はNone）を返します。"""
+    faces = _to_faces(facelets)
+
+    checks = []
+
+    checks.append(('invalid character', np.any(faces == 255, axis=1)))
+    checks.append(('each color must appear 9 times', np.any(np.stack(tuple(np.sum(faces == face, axis=1) for face in range(6)), axis=1) != 9, axis=1)))
+    checks.append(('centers must be URFDLB', np.any(faces[:, 4::9] != np.arange(6), axis=1)))
+
+    # コーナー。UかDの色がある位置をひねりとして、そこから時計回りに並べた色の組み合わせからキューブレットを特定します。
+    corner_colors       = faces[:, _CORNER_FACELETS].astype(int)
+    corner_orientations = np.argmax((corner_colors == _U) | (corner_colors == _D), axis=2)
+    corner_rolled       = np.take_along_axis(corner_colors, (corner_orientations[:, :, np.newaxis] + np.arange(3)) % 3, axis=2)
+    corner_permutations = _CORNER_TABLE[np.minimum(corner_rolled[:, :, 0] * 36 + corner_rolled[:, :, 1] * 6 + corner_rolled[:, :, 2], 6 * 6 * 6 - 1)]
+
+    checks.append(('invalid corner', np.any(corner_permutations < 0, axis=1)))
+    checks.append(('duplicated corner', np.any(np.sort(corner_permutations, axis=1) != np.arange(8), axis=1)))
+    checks.append(('twisted corner', np.sum(corner_orientations, axis=1) % 3 != 0))
+
+    # エッジ。
+    edge_colors       = faces[:, _EDGE_FACELETS].astype(int)
+    edge_codes        = np.minimum(edge_colors[:, :, 0] * 6 + edge_colors[:, :, 1], 6 * 6 - 1)
+    edge_orientations = (_EDGE_TABLE[edge_codes] < 0).astype(int)
+    edge_permutations = np.where(edge_orientations == 0, _EDGE_TABLE[edge_codes], _EDGE_FLIPPED_TABLE[edge_codes])
+
+    checks.append(('invalid edge', np.any(edge_permutations < 0, axis=1)))
+    checks.append(('duplicated edge', np.any(np.sort(edge_permutations, axis=1) != np.arange(12), axis=1)))
+    checks.append(('flipped edge', np.sum(edge_orientations, axis=1) % 2 != 0))
+
+    checks.append(('parity error', _get_parities(corner_permutations) != _get_parities(edge_permutations)))
+
+    result = [None] * len(faces)
+
+    for message, errors in reversed(checks):  # 最初に見つかった（根本の）理由を残します。
+        for i in np.flatnonzero(errors):
+            result[i] = message
+
+    return tuple(result)
+
+
+def to_states(facelets, validate=True):
+    """Kociemba形式の文字列を、game.pyの状態（uint8の2次元配列）に変換します。"""
+    if validate:
+        errors = tuple((i, error) for i, error in enumerate(get_errors(facelets)) if error)
+
+        if errors:
+            raise ValueError(', '.join(f'#{i}: {error}' for i, error in errors))
+
+    return _FACE_TO_COLOR[_to_faces(facelets)[:, _FACELET_INDEXES]].astype(np.uint8)
+
+
+def to_facelets(states):
+    """game.pyの状態（1つでも、複数でも）を、Kociemba形式の文字列に変換します。"""
+    np_states = np.asarray(states).reshape(-1, len(GOAL_STATE))
+
+    faces = np.tile(np.repeat(np.arange(6), 9), (len(np_states), 1))  # センターの分があるので、全部を各面の色で埋めてから上書きします。
+    faces[:, _FACELET_INDEXES] = _COLOR_TO_FACE[np_states]
+
+    return tuple(''.join(FACES[face] for face in row) for row in faces.tolist())
+
+
+def to_actions(moves):
+    """Kociemba形式の手順（U2などを含む）を、game.pyのアクションに変換します。"""
+    return tuple(action for move in moves for action in ((move[0],) * 2 if move.endswith('2') else (move,)))
+
+
+def to_moves(actions):
+    """game.pyのアクションを、同じアクションが2つ続いたらX2にまとめたKociemba形式の手順に変換します。"""
+    result = []
+
+    for action in actions:
+        if result and result[-1] == action:
+            result[-1] = action[0] + '2'
+        else:
+            result.append(action)
+
+    return tuple(result)
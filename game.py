@@ -82,6 +82,14 @@ def get_next_state(state, action):
     return tuple(np_state)
 
 
+def get_next_states(states, action):  # get_next_state()を、NumPyの2次元配列の複数の状態に対してまとめて実行します。
+    result = np.array(states)
+
+    result[:, ACTIONS[action][0]] = result[:, ACTIONS[action][1]]
+
+    return result
+
+
 def render_string(state):
     ns = np.array(state + (6,))[[-1, -1, -1, 40, 41, 42, -1, -1, -1, -1, -1, -1,
                                  -1, -1, -1, 47, -1, 43, -1, -1, -1, -1, -1, -1,
@@ -98,19 +106,24 @@ def render_string(state):
     return '\n'.join(map(lambda line: ''.join(line), partition(12, cs)))
 
 
-def get_x(state):
-    result = np.array(((0, 0, 0, 0, 1, 0, 0, 0, 0,  0, 0, 0, 0, 0, 0, 0, 0, 0,  0, 0, 0, 0, 0, 0, 0, 0, 0,  0, 0, 0, 0, 0, 0, 0, 0, 0,  0, 0, 0, 0, 0, 0, 0, 0, 0,  0, 0, 0, 0, 0, 0, 0, 0, 0),
+_X_CENTERS = np.array(((0, 0, 0, 0, 1, 0, 0, 0, 0,  0, 0, 0, 0, 0, 0, 0, 0, 0,  0, 0, 0, 0, 0, 0, 0, 0, 0,  0, 0, 0, 0, 0, 0, 0, 0, 0,  0, 0, 0, 0, 0, 0, 0, 0, 0,  0, 0, 0, 0, 0, 0, 0, 0, 0),
                        (0, 0, 0, 0, 0, 0, 0, 0, 0,  0, 0, 0, 0, 1, 0, 0, 0, 0,  0, 0, 0, 0, 0, 0, 0, 0, 0,  0, 0, 0, 0, 0, 0, 0, 0, 0,  0, 0, 0, 0, 0, 0, 0, 0, 0,  0, 0, 0, 0, 0, 0, 0, 0, 0),
                        (0, 0, 0, 0, 0, 0, 0, 0, 0,  0, 0, 0, 0, 0, 0, 0, 0, 0,  0, 0, 0, 0, 1, 0, 0, 0, 0,  0, 0, 0, 0, 0, 0, 0, 0, 0,  0, 0, 0, 0, 0, 0, 0, 0, 0,  0, 0, 0, 0, 0, 0, 0, 0, 0),
                        (0, 0, 0, 0, 0, 0, 0, 0, 0,  0, 0, 0, 0, 0, 0, 0, 0, 0,  0, 0, 0, 0, 0, 0, 0, 0, 0,  0, 0, 0, 0, 1, 0, 0, 0, 0,  0, 0, 0, 0, 0, 0, 0, 0, 0,  0, 0, 0, 0, 0, 0, 0, 0, 0),
                        (0, 0, 0, 0, 0, 0, 0, 0, 0,  0, 0, 0, 0, 0, 0, 0, 0, 0,  0, 0, 0, 0, 0, 0, 0, 0, 0,  0, 0, 0, 0, 0, 0, 0, 0, 0,  0, 0, 0, 0, 1, 0, 0, 0, 0,  0, 0, 0, 0, 0, 0, 0, 0, 0),
                        (0, 0, 0, 0, 0, 0, 0, 0, 0,  0, 0, 0, 0, 0, 0, 0, 0, 0,  0, 0, 0, 0, 0, 0, 0, 0, 0,  0, 0, 0, 0, 0, 0, 0, 0, 0,  0, 0, 0, 0, 0, 0, 0, 0, 0,  0, 0, 0, 0, 1, 0, 0, 0, 0)),
                       dtype=float)
+_X_INDEXES = np.concatenate(tuple(map(partial(add, np.array((0, 1, 2, 5, 8, 7, 6, 3))), take(6, iterate(partial(add, 9), 0)))))
+
+
+def get_x(state):
+    return get_xs((state,))[0]
+
 
-    np_state       = np.array(state)
-    target_indexes = np.concatenate(tuple(map(partial(add, np.array((0, 1, 2, 5, 8, 7, 6, 3))), take(6, iterate(partial(add, 9), 0)))))
+def get_xs(states):  # get_x()を、複数の状態に対してまとめて実行します。
+    np_states = np.asarray(states).reshape(-1, len(GOAL_STATE))
 
-    for i in range(6):
-        result[i][target_indexes] = (np_state == i)
+    result = np.repeat(_X_CENTERS[np.newaxis], len(np_states), axis=0)
+    result[:, :, _X_INDEXES] = np_states[:, np.newaxis, :] == np.arange(6)[np.newaxis, :, np.newaxis]
 
-    return np.transpose(np.reshape(result, (6 * 6, 3, 3)), (1, 2, 0))
+    return np.transpose(np.reshape(result, (-1, 6 * 6, 3, 3)), (0, 2, 3, 1))
@@ -0,0 +1,56 @@
+import batch_weighted_a_star
+import tensorflow as tf
+
+from game                import *
+from inference_scheduler import *
+from pathlib             import *
+from random              import *
+from replay_buffer       import *
+from time                import *
+
+
+# 実際に問題を解いて、評価関数の予測と実際の解答での残りの手数がずれた状態をリプレイ・バッファーに溜めます。
+# 優先度は予測のずれの大きさで、探索で多くの状態を評価した（つまり、探索に時間がかかった）問題のものほど高くします。
+# 溜めたものは、python train_driver.py --hard-examplesで学習データに混ぜられます。
+
+
+def get_hard_examples(state, answer, cost_model, predicted_size):
+    states = [state]
+
+    for action in answer:
+        states.append(get_next_state(states[-1], action))
+
+    states = np.array(states[:-1])  # ゴールは除きます。
+    costs  = np.arange(len(answer), 0, -1)
+
+    errors = np.abs(cost_model.predict(get_xs(states), batch_size=10000).flatten() - costs)
+
+    return states, costs, errors * np.log10(10 + predicted_size)
+
+
+def main(problem_size=1000, n=100, l=0.2):
+    model = tf.keras.models.load_model('model/cost.h5')
+
+    buffer_path   = Path('./model/replay-buffer.npz')
+    replay_buffer = ReplayBuffer.load(buffer_path) if buffer_path.exists() else ReplayBuffer()
+
+    for i in range(problem_size):
+        state, _ = get_random_state(randrange(1, 32))
+
+        counting_cost_model = CountingCostModel(model)
+
+        starting_time = time()
+        answer = batch_weighted_a_star.get_answer(state, counting_cost_model, n, l)
+
+        if answer:
+            replay_buffer.add(*get_hard_examples(state, answer, model, counting_cost_model.predicted_size))
+
+        print(f'{i + 1:4d}: {len(answer)} steps, {counting_cost_model.predicted_size} states, {time() - starting_time:6.3f} seconds')
+
+    replay_buffer.save(buffer_path)
+
+    tf.keras.backend.clear_session()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+import numpy as np
+
+from concurrent.futures import *
+from contextlib         import *
+from threading          import *
+from time               import *
+
+
+# 複数のスレッドで同時に実行している探索からのpredict()をまとめて、1回のcost_model.predict()で処理します。
+# cost_model.predict()と同じ形で呼び出せるので、get_answer()のcost_modelにそのまま渡せます。
+#
+# リクエストが来たら、合計がmax_batch_sizeに達するか、searching()中の探索が全部リクエストしてくるか、max_latency秒経つまで待ってからまとめて実行します。
+# 使い終わったらclose()するか、withで使ってください。そうしないと、スレッドがcost_modelを参照したまま残ります。
+#
+# CountingCostModelは、predict()の回数と評価した状態の数を数えるラッパーです。これもcost_modelの代わりにget_answer()に渡せます。
+
+
+class CountingCostModel:
+    def __init__(self, cost_model):
+        self.cost_model     = cost_model
+        self.predict_count  = 0
+        self.predicted_size = 0
+
+    def predict(self, xs, batch_size=None):
+        self.predict_count  += 1
+        self.predicted_size += len(xs)
+
+        return self.cost_model.predict(xs, batch_size=batch_size)
+
+
+class InferenceScheduler:
+    def __init__(self, cost_model, max_batch_size=10000, max_latency=0.005):
+        self.cost_model     = cost_model
+        self.max_batch_size = max_batch_size
+        self.max_latency    = max_latency
+
+        self.condition   = Condition()
+        self.requests    = []
+        self.search_size = 0
+        self.closed      = False
+
+        self.thread = Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def close(self):  # 受け付け済みのリクエストを処理してから、スレッドを終了します。
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+
+        self.thread.join()
+
+    def predict(self, xs, batch_size=None):
+        future = Future()
+
+        with self.condition:
+            if self.closed:
+                raise RuntimeError('InferenceScheduler is closed.')
+
+            self.requests.append((np.asarray(xs), future))
+            self.condition.notify()
+
+        return future.result()
+
+    @contextmanager
+    def searching(self):  # この中で探索してくれれば、全部の探索のリクエストが揃った時点で待たずに実行できます。
+        with self.condition:
+            self.search_size += 1
+
+        try:
+            yield self
+
+        finally:
+            with self.condition:
+                self.search_size -= 1
+                self.condition.notify()
+
+    def is_ready(self):
+        return sum(len(xs) for xs, _ in self.requests) >= self.max_batch_size or 0 < self.search_size <= len(self.requests)
+
+    def get_requests(self):
+        with self.condition:
+            self.condition.wait_for(lambda: self.requests or self.closed)
+
+            deadline = monotonic() + self.max_latency
+
+            while not self.is_ready() and not self.closed and deadline > monotonic():
+                self.condition.wait(deadline - monotonic())
+
+            result, self.requests = self.requests, []
+
+            return result
+
+    def run(self):
+        while requests := self.get_requests():  # closeされて、リクエストが空になったら終了します。
+            xss, futures = zip(*requests)
+
+            try:
+                ys = self.cost_model.predict(np.concatenate(xss), batch_size=self.max_batch_size)
+
+                for future, y in zip(futures, np.split(ys, np.cumsum(tuple(map(len, xss)))[:-1])):
+                    future.set_result(y)
+
+            except Exception as e:
+                for future in futures:
+                    future.set_exception(e)
@@ -0,0 +1,115 @@
+import multiprocessing as mp
+
+from funcy import *
+from game  import *
+
+
+# ビーム・サーチを、状態のハッシュで分割したシャードごとのプロセスで並列に実行します。
+# 各シャードは自分の担当の状態の重複チェックとget_x()と展開を実行して、親プロセスはまとめて予測してビームの上位n個を選ぶだけです。
+
+
+def _get_shard_index(state, shard_size):
+    return hash(state) % shard_size
+
+
+def _shard_main(connection, shard_size):
+    visited_states = {}
+
+    next_states  = ()
+    next_answers = ()
+
+    while True:
+        command, *args = connection.recv()
+
+        if command == 'visit':  # 担当の状態を重複チェックして、ゴールか、ニューラル・ネットワークへの入力を返します。
+            np_states, answers = args
+
+            next_states  = []
+            next_answers = []
+
+            for state, answer in zip(map(tuple, np_states.tolist()), answers):
+                if state not in visited_states or visited_states[state] > len(answer):
+                    visited_states[state] = len(answer)
+
+                    next_states.append(state)
+                    next_answers.append(answer)
+
+            if GOAL_STATE in next_states:
+                connection.send(('goal', next_answers[next_states.index(GOAL_STATE)]))
+                continue
+
+            connection.send(('xs', np.array(tuple(map(get_x, next_states)), dtype=np.uint8).reshape(-1, 3, 3, 6 * 6)))
+
+        elif command == 'expand':  # ビームに選ばれた状態を展開して、担当のシャードごとに分けて返します。
+            indexes, = args
+
+            results = tuple(([], []) for _ in range(shard_size))
+
+            for i in indexes:
+                for action in ACTIONS.keys():
+                    state  = get_next_state(next_states[i], action)
+                    answer = next_answers[i] + (action,)
+
+                    shard_states, shard_answers = results[_get_shard_index(state, shard_size)]
+                    shard_states.append(state)
+                    shard_answers.append(answer)
+
+            connection.send(tuple((np.array(states, dtype=np.uint8).reshape(-1, len(GOAL_STATE)), answers) for states, answers in results))
+
+        elif command == 'close':
+            break
+
+
+def get_answer(initial_state, cost_model, n, process_size=None):
+    process_size = process_size or mp.cpu_count()
+
+    connections, processes = [], []
+
+    for _ in range(process_size):
+        connection, child_connection = mp.Pipe()
+        process = mp.Process(target=_shard_main, args=(child_connection, process_size), daemon=True)
+        process.start()
+
+        connections.append(connection)
+        processes.append(process)
+
+    try:
+        shard_states_and_answers = [(np.zeros((0, len(GOAL_STATE)), dtype=np.uint8), []) for _ in range(process_size)]
+        shard_states_and_answers[_get_shard_index(tuple(map(int, initial_state)), process_size)] = np.array((initial_state,), dtype=np.uint8), [()]
+
+        while True:
+            for connection, (states, answers) in zip(connections, shard_states_and_answers):
+                connection.send(('visit', states, answers))
+
+            results = tuple(connection.recv() for connection in connections)
+
+            for result_type, result in results:
+                if result_type == 'goal':
+                    return result
+
+            xss = tuple(xs for _, xs in results)
+
+            if not sum(map(len, xss)):
+                return ()
+
+            cost_to_goals = cost_model.predict(np.concatenate(xss), batch_size=10000).flatten()
+
+            # ビームの上位n個を選んで、それぞれのシャードでのインデックスに変換します。
+            beam_indexes = np.argsort(cost_to_goals, kind='stable')[:n]
+            offsets      = np.cumsum((0,) + tuple(map(len, xss)))
+
+            for connection, begin, end in zip(connections, offsets, offsets[1:]):
+                connection.send(('expand', (beam_indexes[(beam_indexes >= begin) & (beam_indexes < end)] - begin).tolist()))
+
+            shard_results = tuple(connection.recv() for connection in connections)
+
+            shard_states_and_answers = tuple((np.concatenate(tuple(shard_result[i][0] for shard_result in shard_results)),
+                                              list(mapcat(lambda shard_result: shard_result[i][1], shard_results)))
+                                             for i in range(process_size))
+
+    finally:
+        for connection in connections:
+            connection.send(('close',))
+
+        for process in processes:
+            process.join()
@@ -0,0 +1,100 @@
+import atexit
+import cProfile
+import json
+import os
+import sys
+import threading
+import tracemalloc
+
+from contextlib import *
+from pathlib    import *
+from time       import *
+
+
+# 環境変数RUBIKS_CUBE_PROFILEに出力先のディレクトリを指定すると、プロファイリングが有効になります。
+#
+# RUBIKS_CUBE_PROFILE=temp/profile python solve.py
+#
+# 終了時に、以下を出力します。
+#   trace.json:  trace()で囲んだ区間（展開、エンコード、推論、キューへの追加など）とメモリ使用量のタイムライン。chrome://tracingやPerfettoで開けます。
+#   profile.prof: cProfileの結果。python -m pstatsやsnakevizで開けます。
+#   tensorflow/:  TensorFlowのプロファイラーの結果。TensorBoardで開けます。
+#
+# 無効な場合、trace()は何もしないコンテキスト・マネージャーを返すだけなので、ほぼコストはかかりません。
+
+__all__ = ('enable', 'is_enabled', 'record_memory', 'save_profile', 'trace')
+
+_NULL_CONTEXT = nullcontext()
+
+_directory            = None
+_events               = []
+_profiler             = None
+_tensorflow_directory = None
+
+
+def is_enabled():
+    return _directory is not None
+
+
+def enable(directory):
+    global _directory, _profiler
+
+    _directory = Path(directory)
+    _directory.mkdir(parents=True, exist_ok=True)
+
+    tracemalloc.start()
+
+    _profiler = cProfile.Profile()
+    _profiler.enable()
+
+    atexit.register(save_profile)
+
+
+def _start_tensorflow_profiler():  # TensorFlowは重いので、プロファイリング対象のプログラムがインポートした後で開始します。
+    global _tensorflow_directory
+
+    if _tensorflow_directory is not None or 'tensorflow' not in sys.modules:
+        return
+
+    _tensorflow_directory = _directory / 'tensorflow'
+    sys.modules['tensorflow'].profiler.experimental.start(str(_tensorflow_directory))
+
+
+@contextmanager
+def _trace(name):
+    _start_tensorflow_profiler()
+
+    starting_time = perf_counter_ns()
+
+    try:
+        yield
+
+    finally:
+        _events.append({'name': name, 'ph': 'X', 'ts': starting_time / 1000, 'dur': (perf_counter_ns() - starting_time) / 1000, 'pid': os.getpid(), 'tid': threading.get_ident()})
+
+
+def trace(name):
+    return _trace(name) if _directory is not None else _NULL_CONTEXT
+
+
+def record_memory(name='memory'):
+    if _directory is None:
+        return
+
+    current, peak = tracemalloc.get_traced_memory()
+
+    _events.append({'name': name, 'ph': 'C', 'ts': perf_counter_ns() / 1000, 'pid': os.getpid(), 'args': {'current': current, 'peak': peak}})
+
+
+def save_profile():
+    _profiler.disable()
+    _profiler.dump_stats(str(_directory / 'profile.prof'))
+
+    if _tensorflow_directory is not None:
+        sys.modules['tensorflow'].profiler.experimental.stop()
+
+    (_directory / 'trace.json').write_text(json.dumps({'traceEvents': _events}))
+
+
+if os.environ.get('RUBIKS_CUBE_PROFILE'):
+    enable(os.environ['RUBIKS_CUBE_PROFILE'])
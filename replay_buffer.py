@@ -0,0 +1,55 @@
+import numpy as np
+
+from game    import *
+from pathlib import *
+from random  import *
+
+
+# 探索で評価関数が外れた状態を溜めておくバッファーです。状態は48バイト、コスト（実際にかかった残りの手数）は1バイトで保持します。
+# 容量を超えたら、優先度（評価関数の外れ具合）が低いものから捨てます。
+
+__all__ = ('ReplayBuffer',)  # from random import *のrandom()などが、import先のrandomモジュールを上書きしないようにします。
+
+
+class ReplayBuffer:
+    def __init__(self, capacity=1000000):
+        self.capacity   = capacity
+        self.states     = np.zeros((0, len(GOAL_STATE)), dtype=np.uint8)
+        self.costs      = np.zeros((0,), dtype=np.uint8)
+        self.priorities = np.zeros((0,), dtype=np.float32)
+
+    def __len__(self):
+        return len(self.states)
+
+    def add(self, states, costs, priorities):
+        self.states     = np.concatenate((self.states,     np.asarray(states,     dtype=np.uint8).reshape(-1, len(GOAL_STATE))))
+        self.costs      = np.concatenate((self.costs,      np.asarray(costs,      dtype=np.uint8)))
+        self.priorities = np.concatenate((self.priorities, np.asarray(priorities, dtype=np.float32)))
+
+        if len(self) > self.capacity:
+            indexes = np.argpartition(-self.priorities, self.capacity)[:self.capacity]
+
+            self.states     = self.states[indexes]
+            self.costs      = self.costs[indexes]
+            self.priorities = self.priorities[indexes]
+
+    def sample(self, size):  # 学習の再開時に同じデータになるように、randomモジュールの乱数を使います。
+        indexes = np.array(tuple(randrange(len(self)) for _ in range(size)))
+
+        return self.states[indexes], self.costs[indexes]
+
+    def save(self, path):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+        np.savez_compressed(path, capacity=self.capacity, states=self.states, costs=self.costs, priorities=self.priorities)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            result = cls(int(data['capacity']))
+
+            result.states     = data['states']
+            result.costs      = data['costs']
+            result.priorities = data['priorities']
+
+        return result
@@ -5,7 +5,8 @@ import math
 from typing import Optional, Callable
 
 # CubeStateReaderをインポート
-from cube_state_reader import CubeStateReader 
+from cube_state_reader import CubeStateReader
+from cube_state import LogicalCube
 
 class RubiksCube(Entity):
     CUBE_COLORS = {
@@ -29,8 +30,12 @@ class RubiksCube(Entity):
     def __init__(self):
         super().__init__()
         self.cubelets = []
-        
-        self.create_cube() 
+        # グリッド上の位置 -> キューブレット。get_layerで全キューブレットを走査しないための索引
+        self.grid: dict[tuple[int, int, int], Entity] = {}
+        # 置換表で更新する論理的な状態。get_current_cube_stateはこちらを返す
+        self.logical_cube = LogicalCube(self.MOVE_MAP)
+
+        self.create_cube()
         
         self.center_cube = Entity(model='cube', scale=0.99, visible=False, parent=self)
 
@@ -56,6 +61,7 @@ class RubiksCube(Entity):
                         parent=self 
                     )
                     self.cubelets.append(cubelet_base)
+                    self.grid[(x, y, z)] = cubelet_base
 
                     face_scale = 0.98
 
@@ -86,15 +92,16 @@ class RubiksCube(Entity):
                         face.initial_local_normal = Vec3(-1, 0, 0) # X-方向
 
     def get_layer(self, axis: str, layer: int) -> list[Entity]:
-        return [c for c in self.cubelets if round(getattr(c.position, axis), 1) == layer]
+        return [self.grid[p] for p in self.logical_cube.layer_positions[(axis, layer)]]
 
-    def perform_animated_move(self, move: str, on_complete: Optional[Callable] = None):
-        if self.is_rotating:
-            if on_complete:
-                on_complete()
-            return
-        self.is_rotating = True
+    def apply_logical_move(self, move: str):
+        """論理的な状態とグリッドの索引を、回転1回分だけ更新する."""
+        self.logical_cube.apply_move(move)
+
+        moved = {to: self.grid[frm] for frm, to in self.logical_cube.position_tables[move].items()}
+        self.grid.update(moved)
 
+    def _start_move(self, move: str) -> tuple[Entity, list[Entity], str, float]:
         axis_char, layer_val, degrees = self.MOVE_MAP[move]
 
         targets = self.get_layer(axis_char, layer_val)
@@ -107,31 +114,56 @@ class RubiksCube(Entity):
 
         animate_property = f'rotation_{axis_char}'
         target_angle = getattr(pivot, animate_property) + degrees
-        pivot.animate(animate_property, target_angle, duration=0.2, curve=curve.linear)
+
+        return pivot, targets, animate_property, target_angle
+
+    def _finish_move(self, move: str, pivot: Entity, targets: list[Entity]):
+        for c in targets:
+            c.world_parent = self 
+            
+            c.position = Vec3(
+                round(c.position.x),
+                round(c.position.y),
+                round(c.position.z)
+            )
+            
+            c.rotation = Vec3(
+                round(c.rotation_x / 90.0) * 90.0,
+                round(c.rotation_y / 90.0) * 90.0,
+                round(c.rotation_z / 90.0) * 90.0
+            )
+            
+        destroy(pivot)
+        self.apply_logical_move(move)
+
+    def perform_animated_move(self, move: str, on_complete: Optional[Callable] = None, duration: float = 0.2):
+        if self.is_rotating:
+            if on_complete:
+                on_complete()
+            return
+        self.is_rotating = True
+
+        pivot, targets, animate_property, target_angle = self._start_move(move)
+        pivot.animate(animate_property, target_angle, duration=duration, curve=curve.linear)
 
         def on_animation_finished_callback():
-            for c in targets:
-                c.world_parent = self 
-                
-                c.position = Vec3(
-                    round(c.position.x),
-                    round(c.position.y),
-                    round(c.position.z)
-                )
-                
-                c.rotation = Vec3(
-                    round(c.rotation_x / 90.0) * 90.0,
-                    round(c.rotation_y / 90.0) * 90.0,
-                    round(c.rotation_z / 90.0) * 90.0
-                )
-                
-            destroy(pivot) 
+            self._finish_move(move, pivot, targets)
             self.is_rotating = False
             
             if on_complete:
                 on_complete()
 
-        invoke(on_animation_finished_callback, delay=0.2 + 0.01)
+        invoke(on_animation_finished_callback, delay=duration + 0.01)
+
+    def perform_instant_move(self, move: str):
+        """アニメーションなしで、同じフレームの中で回転を適用する."""
+        if self.is_rotating:
+            return
+
+        pivot, targets, animate_property, target_angle = self._start_move(move)
+        setattr(pivot, animate_property, target_angle)
+
+        self._finish_move(move, pivot, targets)
 
 
     def handle_input(self, key: str):
@@ -244,11 +276,27 @@ class RubiksCube(Entity):
             self.mouse_drag_start_pos = None
 
     def get_current_cube_state(self) -> str:
-        """CubeStateReaderを使って現在のキューブの状態文字列を取得する."""
-        return self.state_reader.get_state(self.cubelets)
+        """論理的な状態から現在のキューブの状態文字列を取得する."""
+        return self.logical_cube.get_state()
+
+    def get_kociemba_state(self) -> str:
+        """標準のKociemba形式の状態文字列を取得する（ソルバーやfacelet.pyに渡す用）."""
+        return self.logical_cube.get_kociemba_state()
+
+    def check_state_consistency(self) -> bool:
+        """デバッグ用。CubeStateReaderで幾何的に読み取った状態と論理的な状態が一致するかを確認する."""
+        geometric_state = self.state_reader.get_state(self.cubelets)
+        logical_state = self.logical_cube.get_state()
+
+        if geometric_state != logical_state:
+            print(f"状態が一致しません: 幾何={geometric_state} 論理={logical_state}")
+
+        return geometric_state == logical_state
 
     def reset_to_solved_state(self):
         for cubelet in self.cubelets:
             destroy(cubelet)
         self.cubelets = []
+        self.grid = {}
+        self.logical_cube.reset()
         self.create_cube()
\ No newline at end of file
@@ -0,0 +1,75 @@
+import json
+import numpy as np
+import zipfile
+
+from game           import *
+from pathlib        import *
+from visited_states import *
+
+
+# 探索の途中経過（キュー、訪問済みの状態とそのコスト、統計情報）をNumPyのnpz形式で保存します。
+# キューの要素は(コスト, pack_states()で詰めた状態, ACTIONSのインデックスを並べたbytesの手順)です。
+# 手順はACTIONSのインデックスの並びにして、状態は48バイトにして保存するので、コンパクトで他のマシンでも読めます。
+# 訪問済みの状態は、VisitedStatesのソート済みのラン（18バイトに詰めた状態とコスト）のまま、memmapから少しずつ書き出して、少しずつ読み込みます。
+
+
+def save_checkpoint(path, initial_state, queue, visited_states, stats):
+    action_names = tuple(ACTIONS.keys())
+
+    _, queue_keys, queue_answers = zip(*queue) if queue else ((), (), ())
+    visited_runs                 = visited_states.get_sorted_runs()
+
+    path     = Path(path)
+    tmp_path = path.with_name(path.name + '.tmp')
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    with tmp_path.open('wb') as f:
+        np.savez_compressed(f,
+                            action_names=np.array(action_names),
+                            initial_state=np.array(initial_state, dtype=np.uint8),
+                            queue_costs=np.array(tuple(cost for cost, _, _ in queue), dtype=np.float64),
+                            queue_states=unpack_keys(queue_keys),
+                            queue_answer_lengths=np.array(tuple(map(len, queue_answers)), dtype=np.uint16),
+                            queue_answer_actions=np.frombuffer(b''.join(queue_answers), dtype=np.uint8),
+                            visited_run_size=np.array(len(visited_runs)),
+                            **{f'visited_run_{i}_{name}': xs for i, run in enumerate(visited_runs) for (name, _), xs in zip(RUN_DTYPES, run)},  # memmapはnditerで少しずつ書き込まれます。
+                            stats=np.array(json.dumps(stats)))
+
+    tmp_path.replace(path)  # 書き込み中に落ちても、前回のチェックポイントは壊れないようにします。
+
+
+def _read_array_chunks(zip_file, name, chunk_size):
+    with zip_file.open(f'{name}.npy') as f:
+        version = np.lib.format.read_magic(f)
+        _, _, dtype = np.lib.format.read_array_header_1_0(f) if version == (1, 0) else np.lib.format.read_array_header_2_0(f)
+
+        while data := f.read(chunk_size * dtype.itemsize):
+            yield np.frombuffer(data, dtype=dtype)
+
+
+def _read_run_chunks(path, i, chunk_size):
+    with zipfile.ZipFile(path) as zip_file:
+        yield from zip(*(_read_array_chunks(zip_file, f'visited_run_{i}_{name}', chunk_size) for name, _ in RUN_DTYPES))
+
+
+def load_checkpoint(path, initial_state, visited_states, chunk_size=1 << 20):
+    with np.load(path) as data:
+        if tuple(data['initial_state']) != tuple(initial_state):
+            raise ValueError(f'{path} is a checkpoint of another problem.')
+
+        if tuple(data['action_names'].tolist()) != tuple(ACTIONS.keys()):
+            raise ValueError(f'{path} was saved with different actions.')
+
+        answer_ends   = np.cumsum(data['queue_answer_lengths']).tolist()
+        answer_begins = [0] + answer_ends[:-1]
+        answers       = data['queue_answer_actions'].tobytes()
+
+        queue          = list(zip(data['queue_costs'].tolist(), pack_states(data['queue_states']), (answers[begin:end] for begin, end in zip(answer_begins, answer_ends))))
+        stats          = json.loads(str(data['stats']))
+        run_size       = int(data['visited_run_size'])
+
+    for i in range(run_size):
+        visited_states.load_run_chunks(_read_run_chunks(path, i, chunk_size))
+
+    return queue, stats
@@ -19,7 +19,7 @@ def main():
 
     starting_time = time()
 
-    answer = batch_weighted_a_star.get_answer(state, model, 10000, 0.6)  # 論文だと、最適解を出す場合はn=10000でl=0.6が良いらしい。
+    answer = batch_weighted_a_star.get_answer(state, model, 10000, 0.6, checkpoint_path='temp/hardest-problem-checkpoint.npz', max_visited_state_size=10000000)  # 論文だと、最適解を出す場合はn=10000でl=0.6が良いらしい。途中で落ちても、再実行すればチェックポイントから再開します。訪問済みの状態が1,000万を超えたらディスクにはき出します。
 
     print(f'{len(answer)} steps, {time() - starting_time:6.3f} seconds')
     print(' '.join(map(lambda action: action if len(action) == 2 else action + ' ', question)))
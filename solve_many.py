@@ -0,0 +1,45 @@
+import batch_weighted_a_star
+import tensorflow as tf
+
+from concurrent.futures  import *
+from game                import *
+from inference_scheduler import *
+from random              import *
+from time                import *
+
+
+# 複数の問題を同時に解きます。各探索のpredict()はInferenceSchedulerでまとめて実行されます。
+
+
+def get_answers(states, cost_model, n, l, max_workers=None):
+    with InferenceScheduler(cost_model) as scheduler:
+        def get_answer(state):
+            with scheduler.searching():
+                return batch_weighted_a_star.get_answer(state, scheduler, n, l)
+
+        with ThreadPoolExecutor(max_workers or len(states)) as executor:
+            return tuple(executor.map(get_answer, states))
+
+
+def main():
+    model = tf.keras.models.load_model('model/cost.h5')
+
+    seed(0)
+
+    states, questions = zip(*(get_random_state(32) for _ in range(10)))
+
+    starting_time = time()
+    answers = get_answers(states, model, 100, 0.2)
+
+    print(f'{len(answers)} problems, {time() - starting_time:6.3f} seconds')
+
+    for question, answer in zip(questions, answers):
+        print(f'{len(answer)} steps')
+        print(' '.join(map(lambda action: action if len(action) == 2 else action + ' ', question)))
+        print(' '.join(map(lambda action: action if len(action) == 2 else action + ' ', answer  )))
+
+    tf.keras.backend.clear_session()
+
+
+if __name__ == '__main__':
+    main()
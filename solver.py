@@ -1,36 +1,134 @@
 # solver.py
 
 # App の代わりに Ursina をインポートします
-from ursina import Button, color, Text, invoke, camera, window, Ursina# from rubik_solver.cubie import RubikSolver 
+from ursina import Button, Entity, color, Text, camera, window, Ursina# from rubik_solver.cubie import RubikSolver 
 
 # Kociembaソルバーのインポート
 from rubik_solver import RubikSolver  # type: ignore
 
-# RubiksCube クラスの仮定義（本来は別ファイルからインポートするか、ここに実装する必要があります）
-class RubiksCube:
-    MOVE_MAP = {
-        'U': None, 'U\'': None, 'U2': None,
-        'D': None, 'D\'': None, 'D2': None,
-        'L': None, 'L\'': None, 'L2': None,
-        'R': None, 'R\'': None, 'R2': None,
-        'F': None, 'F\'': None, 'F2': None,
-        'B': None, 'B\'': None, 'B2': None,
-    }
-    is_rotating = False
-
-    def perform_animated_move(self, move, on_complete=None):
-        if on_complete:
-            on_complete()
-
-    def get_current_cube_state(self):
-        # 仮のキューブ状態（本来は実際の状態を返す必要があります）
-        return 'UUUUUUUUURRRRRRRRRFFFFFFFFFDDDDDDDDDLLLLLLLLLBBBBBBBBB'
-
-    def reset_to_solved_state(self):
-        pass
+import json
+import multiprocessing as mp
+import random
+import sys
+import time
+import urllib.request
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable, Iterable, Optional
+
+from cube_state import to_app_moves
+from rubiks_cube import RubiksCube
+
+SOLVED_STATE = 'UUUUUUUUURRRRRRRRRFFFFFFFFFDDDDDDDDDLLLLLLLLLBBBBBBBBB'
+
+# ソルバーのプロセスの中で使い回す、ルックアップ・テーブル読み込み済みのソルバー
+_solver: Optional[RubikSolver] = None
+# 指定されていれば、Kociembaソルバーの代わりにsolver_server.py（学習した評価関数での探索）に解かせる
+_solver_server_url: Optional[str] = None
+
+
+def _warm_up_solver(solver_server_url: Optional[str] = None):
+    """ソルバーのプロセスの初期化。ソルバーを生成して、一度解かせてテーブルを読み込ませておく."""
+    global _solver, _solver_server_url
+
+    if solver_server_url:
+        _solver_server_url = solver_server_url
+        return
+
+    _solver = RubikSolver()
+
+    try:
+        _solver.solve(SOLVED_STATE, 'Kociemba')
+    except Exception as e:
+        print(f"ソルバーのウォームアップに失敗しました: {e}")
+
+
+def _is_solver_ready() -> bool:
+    return _solver is not None or _solver_server_url is not None
+
+
+def _terminate_workers(executor: ProcessPoolExecutor):
+    """実行中の探索ごと、executorのワーカー・プロセスを止める."""
+    if hasattr(executor, 'terminate_workers'):  # Python 3.14以降
+        executor.terminate_workers()
+        return
+
+    for process in list((executor._processes or {}).values()):  # type: ignore
+        process.terminate()
+
+
+def _solve(kociemba_state_str: str) -> list[str]:
+    """標準のKociemba形式の状態を解いて、標準の記法の手順（U2などを含む）を返す."""
+    if _solver_server_url:
+        request = urllib.request.Request(f'{_solver_server_url}/solve', json.dumps({'facelets': kociemba_state_str}).encode(), {'Content-Type': 'application/json'})
+
+        with urllib.request.urlopen(request) as response:
+            return list(json.loads(response.read())['moves'])
+
+    return [str(move) for move in _solver.solve(kociemba_state_str, 'Kociemba')]  # type: ignore
+
+
+class MoveQueuePlayer:
+    """キューに積んだ回転を、毎フレームのupdateで1つずつ再生する。durationが0なら、残りをすべて同じフレームで適用する."""
+
+    SPEEDS = (('1x', 0.2), ('2x', 0.1), ('4x', 0.05), ('瞬時', 0.0))
+
+    def __init__(self, rubiks_cube: RubiksCube, on_move: Optional[Callable[[str, int], None]] = None):
+        self.rubiks_cube = rubiks_cube
+        self.on_move = on_move  # (回転, 残りの手数)で呼ばれる
+        self.queue: deque[str] = deque()
+        self.on_finished: Optional[Callable] = None
+        self.speed_index = 0
+
+    @property
+    def speed_name(self) -> str:
+        return self.SPEEDS[self.speed_index][0]
+
+    @property
+    def duration(self) -> float:
+        return self.SPEEDS[self.speed_index][1]
+
+    @property
+    def is_playing(self) -> bool:
+        return bool(self.queue) or self.on_finished is not None
+
+    def next_speed(self):
+        self.speed_index = (self.speed_index + 1) % len(self.SPEEDS)
+
+    def play(self, moves: Iterable[str], on_finished: Optional[Callable] = None):
+        """movesはRubiksCube.MOVE_MAPの回転。標準の記法の手順は、cube_state.to_app_movesで変換してから渡す."""
+        self.queue.extend(moves)
+        self.on_finished = on_finished
+
+    def clear(self):
+        self.queue.clear()
+        self.on_finished = None
+
+    def update(self):
+        if self.rubiks_cube.is_rotating:
+            return
+
+        if self.queue:
+            if self.duration <= 0:
+                # 途中の状態は描画せずに、最後の状態だけを描画する
+                while self.queue:
+                    self.rubiks_cube.perform_instant_move(self.queue.popleft())
+                if self.on_move:
+                    self.on_move('', 0)
+            else:
+                move = self.queue.popleft()
+                if self.on_move:
+                    self.on_move(move, len(self.queue))
+                self.rubiks_cube.perform_animated_move(move, duration=self.duration)
+            return
+
+        if self.on_finished:
+            on_finished, self.on_finished = self.on_finished, None
+            on_finished()
+
 
 class RubiksCubeSolverApp(Ursina): # ここを Ursina に変更しました
-    def __init__(self):
+    def __init__(self, solver_server_url: Optional[str] = None):
         super().__init__()
         window.fullscreen = False
         window.exit_button.visible = False 
@@ -41,6 +139,15 @@ class RubiksCubeSolverApp(Ursina): # ここを Ursina に変更しました
 
         self.rubiks_cube = RubiksCube()
 
+        # ソルバーは描画のスレッドを止めないように別プロセスで動かし、テーブルを読み込んだまま使い回す
+        # solver_server_urlを指定すると、Kociembaソルバーの代わりにsolver_server.pyの学習した探索で解く
+        self.solver_server_url = solver_server_url
+        self.solver_executor: Optional[ProcessPoolExecutor] = None
+        self.solver_future: Optional[Future] = None
+        self.start_solver()
+
+        self.move_player = MoveQueuePlayer(self.rubiks_cube, on_move=self._on_move)
+
         self.scramble_button = Button(
             text='スクランブル',
             color=color.azure, # type: ignore
@@ -65,91 +172,157 @@ class RubiksCubeSolverApp(Ursina): # ここを Ursina に変更しました
             on_click=self.reset_cube
         )
 
+        self.cancel_button = Button(
+            text='キャンセル',
+            color=color.gray, # type: ignore
+            scale=(0.2, 0.05),
+            x=0.05, y=0.45,
+            on_click=self.cancel
+        )
+
+        self.speed_button = Button(
+            text=f'速度: {self.move_player.speed_name}',
+            color=color.violet, # type: ignore
+            scale=(0.2, 0.05),
+            x=0.3, y=0.45,
+            on_click=self.change_speed
+        )
+
         self.solve_text = Text(text='解決手順:', x=-0.8, y=0.35, scale=1.5, origin=(-0.5, 0.5))
         self.current_move_text = Text(text='', x=-0.8, y=0.3, scale=1.5, origin=(-0.5, 0.5))
-        self.status_text = Text(text='準備完了', x=-0.8, y=0.4, scale=1.5, origin=(-0.5, 0.5))
+        self.status_text = Text(text='ソルバーを準備中...', x=-0.8, y=0.4, scale=1.5, origin=(-0.5, 0.5))
+
+        self.is_solving = False
+
+        # 毎フレーム、ソルバーの結果の確認と手順の再生を進める
+        self.updater = Entity(update=self.update_frame)
+
+    def start_solver(self):
+        """ソルバーのプロセスを起動して、ウォームアップを始める."""
+        self.solver_executor = ProcessPoolExecutor(max_workers=1, mp_context=mp.get_context('spawn'), initializer=_warm_up_solver, initargs=(self.solver_server_url,))
+        self.solver_future = self.solver_executor.submit(_is_solver_ready)
+        self.solver_started_at = time.perf_counter()
+
+    def close_solver(self):
+        """探索の途中でも待たずに、ソルバーのプロセスを終了する."""
+        if self.solver_executor is None:
+            return
+
+        _terminate_workers(self.solver_executor)
+        self.solver_executor.shutdown(wait=True, cancel_futures=True)
+        self.solver_executor = None
+        self.solver_future = None
+
+    @property
+    def is_busy(self) -> bool:
+        return self.rubiks_cube.is_rotating or self.is_solving or self.move_player.is_playing
+
+    def update_frame(self):
+        if self.solver_future is not None:
+            self._poll_solver()
+
+        self.move_player.update()
+
+    def _poll_solver(self):
+        future = self.solver_future
+        elapsed = time.perf_counter() - self.solver_started_at
+
+        if not future.done():
+            if self.is_solving:
+                self.status_text.text = f"解を探索中... {elapsed:.1f}秒"
+            return
+
+        self.solver_future = None
+
+        if not self.is_solving:  # ウォームアップの完了
+            try:
+                future.result()
+                self.status_text.text = f"準備完了 (ソルバーの準備に{elapsed:.1f}秒)"
+            except Exception as e:
+                self.status_text.text = f"ソルバーエラー: {e}"
+                print(f"ソルバーエラー: {e}")
+            return
+
+        try:
+            solution = future.result()
+        except Exception as e:
+            self.status_text.text = f"ソルバーエラー: {e}"
+            print(f"ソルバーエラー: {e}")
+            self.is_solving = False
+            return
 
-        self.moves_to_perform = []
-        self.current_move_index = 0
         self.is_solving = False
+        self.solve_text.text = f"解決手順: {' '.join(solution)}"
+        self.status_text.text = f"解決手順を適用中... (探索{elapsed:.1f}秒)"
+        self.move_player.play(to_app_moves(solution), on_finished=self._on_solve_finished)
+
+    def _on_move(self, move: str, remaining_move_count: int):
+        self.current_move_text.text = f"実行中: {move} (残り{remaining_move_count}手)" if move else ""
+
+    def _on_solve_finished(self):
+        self.status_text.text = "解決完了！"
+        self.current_move_text.text = ""
 
     def scramble_cube(self):
-        if self.rubiks_cube.is_rotating or self.is_solving:
+        if self.is_busy:
             return
 
         self.status_text.text = "--- キューブをスクランブル中（15手） ---"
         self.solve_text.text = "解決手順:"
         self.current_move_text.text = ""
 
-        scramble_moves = []
         possible_moves = list(self.rubiks_cube.MOVE_MAP.keys())
-        import random
-        for _ in range(15):
-            scramble_moves.append(random.choice(possible_moves))
-        
-        self._perform_scramble_sequence(scramble_moves)
-
-    def _perform_scramble_sequence(self, moves: list[str]):
-        if not moves:
-            self.status_text.text = "スクランブル完了。\n'Solve Cube' ボタンを押してください。"
-            print("\nスクランブル完了。")
-            return
+        scramble_moves = [random.choice(possible_moves) for _ in range(15)]
 
-        move = moves.pop(0)
-        self.rubiks_cube.perform_animated_move(move, on_complete=lambda: self._perform_scramble_sequence(moves))
-        self.status_text.text = f"スクランブル手順: {' '.join(moves[:5])}..." 
-        print(f"スクランブル手順: {move}", end=' ') 
+        print(f"スクランブル手順: {' '.join(scramble_moves)}")
+        self.move_player.play(scramble_moves, on_finished=self._on_scramble_finished)
+
+    def _on_scramble_finished(self):
+        self.status_text.text = "スクランブル完了。\n'Solve Cube' ボタンを押してください。"
+        self.current_move_text.text = ""
+        print("\nスクランブル完了。")
 
     def solve_cube(self):
-        if self.rubiks_cube.is_rotating or self.is_solving:
+        if self.is_busy:
             return
 
-        self.status_text.text = "--- ソルバーを開始します ---"
-        self.is_solving = True
-        
-        current_cube_state_str: str = self.rubiks_cube.get_current_cube_state()
+        current_cube_state_str: str = self.rubiks_cube.get_kociemba_state()
 
         print(f"\n現在のキューブの状態 (Kociemba): {current_cube_state_str}")
 
         if '?' in current_cube_state_str:
             self.status_text.text = "エラー: キューブの状態を正しく読み取れませんでした。'?'\nが含まれています。"
-            self.is_solving = False
             return
 
-        try:
-            # RubikSolverのインスタンスをここで生成します
-            solver = RubikSolver() 
-
-            # ここでアルゴリズムを文字列で指定します
-            solution = solver.solve(current_cube_state_str, 'Kociemba') 
+        if self.solver_future is not None:  # ウォームアップが終わるまでは、キューに積まずに待ってもらう
+            self.status_text.text = "ソルバーを準備中です。少し待ってからもう一度押してください。"
+            return
 
-            self.moves_to_perform = solution
-            self.current_move_index = 0
-            self.solve_text.text = f"解決手順: {' '.join(self.moves_to_perform)}"
-            self.status_text.text = "解決手順を適用中..."
-            self._perform_solve_sequence()
-        except Exception as e:
-            self.status_text.text = f"ソルバーエラー: {e}"
-            print(f"ソルバーエラー: {e}")
-            self.is_solving = False
+        self.status_text.text = "--- ソルバーを開始します ---"
+        self.is_solving = True
+        self.solver_started_at = time.perf_counter()
+        self.solver_future = self.solver_executor.submit(_solve, current_cube_state_str)
 
-    def _perform_solve_sequence(self):
-        if self.current_move_index >= len(self.moves_to_perform):
-            self.status_text.text = "解決完了！"
+    def cancel(self):
+        """探索中なら結果を捨て、再生中なら残りの手順を捨てる."""
+        if self.is_solving:
+            # 実行中の探索はプロセスごと止めて、ウォームアップ済みのプロセスを作り直す。
             self.is_solving = False
-            return
+            self.close_solver()
+            self.start_solver()
+            self.status_text.text = "探索をキャンセルしました。ソルバーを準備中..."
 
-        move = self.moves_to_perform[self.current_move_index]
-        self.current_move_text.text = f"実行中: {move}"
-        
-        self.rubiks_cube.perform_animated_move(move, on_complete=self._next_solve_step)
+        elif self.move_player.is_playing:
+            self.move_player.clear()
+            self.status_text.text = "再生をキャンセルしました"
+            self.current_move_text.text = ""
 
-    def _next_solve_step(self):
-        self.current_move_index += 1
-        invoke(self._perform_solve_sequence, delay=0.1) 
+    def change_speed(self):
+        self.move_player.next_speed()
+        self.speed_button.text = f'速度: {self.move_player.speed_name}'
 
     def reset_cube(self):
-        if self.rubiks_cube.is_rotating or self.is_solving:
+        if self.is_busy:
             return
         self.rubiks_cube.reset_to_solved_state()
         self.status_text.text = "リセット完了"
@@ -158,5 +331,10 @@ class RubiksCubeSolverApp(Ursina): # ここを Ursina に変更しました
         self.is_solving = False
 
 if __name__ == '__main__':
-    app = RubiksCubeSolverApp()
-    app.run()
\ No newline at end of file
+    # python solver.py [--server http://127.0.0.1:8765]
+    app = RubiksCubeSolverApp(sys.argv[sys.argv.index('--server') + 1] if '--server' in sys.argv else None)
+
+    try:
+        app.run()
+    finally:
+        app.close_solver()  # 探索中に閉じても、探索の終了を待たずに終われるようにする
\ No newline at end of file
@@ -0,0 +1,101 @@
+import batch_weighted_a_star
+import beam_search
+import json
+import tensorflow as tf
+
+from facelet             import *
+from game                import *
+from http.server         import *
+from inference_scheduler import *
+from time                import *
+
+
+# モデルを1回だけ読み込んで温めておいて、localhostへのHTTPで問題を受け付けて解答を返すサーバーです。
+#
+# curl -d '{"question": "U U F R"}' http://localhost:8765/solve
+#
+# 問題は"question"（スクランブルの手順）か"state"（game.pyの状態）か"facelets"（Kociemba形式の文字列）で指定します。"algorithm"、"n"、"l"も指定できます。
+
+
+def solve(request, cost_model):
+    if 'facelets' in request:
+        state = tuple(to_states(request['facelets'])[0])  # 解けない状態なら、ValueErrorになります。
+    elif 'state' in request:
+        state = tuple(request['state'])
+    else:
+        state = GOAL_STATE
+
+        for action in request['question'].split():
+            state = get_next_state(state, action)
+
+    if len(state) != len(GOAL_STATE) or sorted(state) != sorted(GOAL_STATE):
+        raise ValueError('invalid state.')
+
+    if error := get_errors(to_facelets(state))[0]:  # 解けない状態を探索すると、いつまでも終わらないので弾きます。
+        raise ValueError(f'unsolvable state: {error}.')
+
+    counting_cost_model = CountingCostModel(cost_model)
+
+    starting_time = time()
+
+    if state == GOAL_STATE:  # 探索はゴールを子の中からしか見つけないので、解けている状態を探索するといつまでも終わりません。
+        answer = ()
+    elif request.get('algorithm', 'batch_weighted_a_star') == 'beam_search':
+        answer = beam_search.get_answer(state, counting_cost_model, request.get('n', 100))
+    else:
+        answer = batch_weighted_a_star.get_answer(state, counting_cost_model, request.get('n', 100), request.get('l', 0.2))
+
+    return {'answer':         answer,
+            'moves':          to_moves(answer),
+            'steps':          len(answer),
+            'time':           time() - starting_time,
+            'predict_count':  counting_cost_model.predict_count,
+            'predicted_size': counting_cost_model.predicted_size}
+
+
+def create_request_handler(cost_model):
+    class RequestHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            if self.path != '/solve':
+                self.send_error(404)
+                return
+
+            try:
+                with cost_model.searching():
+                    response = solve(json.loads(self.rfile.read(int(self.headers['Content-Length']))), cost_model)
+            except (KeyError, TypeError, ValueError) as e:
+                self.send_error(400, str(e))
+                return
+
+            body = json.dumps(response).encode()
+
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    return RequestHandler
+
+
+def main(host='127.0.0.1', port=8765):
+    model = tf.keras.models.load_model('model/cost.h5')
+    model.predict(np.array((get_x(GOAL_STATE),)))  # 最初のpredict()はグラフの構築で遅いので、ここで済ませておきます。
+
+    with InferenceScheduler(model) as scheduler:
+        server = ThreadingHTTPServer((host, port), create_request_handler(scheduler))
+
+        print(f'listening on http://{host}:{port}/solve')
+
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+        server.server_close()
+
+    tf.keras.backend.clear_session()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,17 +1,9 @@
-import train
-
-from pathlib import *
-from shutil  import *
+import train_driver
 
 
+# 中断しても続きから再開できるように、train_driverで学習します。
 def main():
-    for i in range(7, 10):
-        train.main()
-
-        src = Path('./model/cost.h5')
-        to  = Path(f'./model/cost-1024x4-1000x1000x{i + 1:02d}00.h5')
-
-        copy(str(src), str(to))
+    train_driver.main(epochs=1000, snapshot_epochs=100)
 
 
 if __name__ == '__main__':
@@ -1,11 +1,14 @@
+import sys
 import tensorflow as tf
 
-from funcy   import *
-from game    import *
-from pathlib import *
+from funcy     import *
+from game      import *
+from pathlib   import *
+from profiling import *
+from random    import *
 
 
-def computational_graph():
+def computational_graph(width=1024, height=4):  # 蒸留の生徒用に、幅と深さを変えられるようにしました。
     def add():
         return tf.keras.layers.Add()
 
@@ -36,42 +39,95 @@ def computational_graph():
                               identity),
                         add())
 
-    W = 1024
-    H =    4
-
-    return rcompose(conv(W, 1),
-                    rcompose(*repeatedly(partial(residual_block, W), H)),
+    return rcompose(conv(width, 1),
+                    rcompose(*repeatedly(partial(residual_block, width), height)),
                     global_average_pooling(),
                     dense(1),
                     relu())  # マイナスの値が出ると面倒な気がするので、ReLUしてみました。
 
 
-def main():
-    def create_model():
-        result = tf.keras.Model(*juxt(identity, computational_graph())(tf.keras.Input(shape=(3, 3, 6 * 6))))
+def output_layer():  # mixed precisionの場合でも、出力はfloat32にします。
+    return tf.keras.layers.Activation('linear', dtype='float32') if tf.keras.mixed_precision.global_policy().compute_dtype == 'float16' else identity
+
+
+def create_model():
+    result = tf.keras.Model(*juxt(identity, rcompose(computational_graph(), output_layer()))(tf.keras.Input(shape=(3, 3, 6 * 6))))
 
-        result.compile(optimizer='adam', loss='mean_squared_error', metrics=['mean_absolute_error'])
-        result.summary()
+    result.compile(optimizer='adam', loss='mean_squared_error', metrics=['mean_absolute_error'])
+    result.summary()
 
-        return result
+    return result
 
-    def create_generator(batch_size):
-        while True:
+
+def create_generator(batch_size, replay_buffer=None, replay_ratio=0.25):  # replay_bufferを指定すると、replay_ratioの割合で探索で評価関数が外れた状態を混ぜます。
+    replay_size = int(batch_size * replay_ratio) if replay_buffer is not None and len(replay_buffer) else 0
+
+    while True:
+        with trace('generate'):
             xs = []
             ys = []
 
-            for i in range(batch_size):
+            for i in range(batch_size - replay_size):
                 step = randrange(1, 32)
 
                 xs.append(get_x(get_random_state(step)[0]))
                 ys.append(step)
 
-            yield np.array(xs), np.array(ys)
+            if replay_size:
+                states, costs = replay_buffer.sample(replay_size)
+
+                xs.extend(get_xs(states))
+                ys.extend(costs)
+
+        yield np.array(xs), np.array(ys)
+
+
+def create_value_iteration_generator(target_model, batch_size):
+    goal_state = np.array(GOAL_STATE)
+
+    while True:
+        with trace('generate'):
+            states = np.array(tuple(get_random_state(randrange(1, 32))[0] for _ in range(batch_size)))
+
+            # 全部の状態の全部の次の状態をまとめて作って、まとめて予測します。
+            next_states = np.concatenate(tuple(get_next_states(states, action) for action in ACTIONS.keys()))
+
+        with trace('infer'):
+            next_costs = np.reshape(target_model.predict(get_xs(next_states), batch_size=10000), (len(ACTIONS), batch_size))
+
+        next_costs[np.reshape(np.all(next_states == goal_state, axis=1), (len(ACTIONS), batch_size))] = 0
+
+        ys = 1 + np.min(next_costs, axis=0)
+        ys[np.all(states == goal_state, axis=1)] = 0
+
+        yield get_xs(states), ys
+
+
+# value_iteration=Trueにすると、正解をまわした回数ではなく、DeepCubeAの論文のように「1 + 次の状態のコストの予測の最小値」にします。
+# 予測には、target_update_stepsバッチごとに学習中のモデルの重みをコピーするターゲット・ネットワークを使います。
+def main(value_iteration=False, target_update_steps=1000):
+    def update_target_model(target_model, model):
+        steps = [0]  # batchはエポックごとに0に戻るので、自前で数えます。
+
+        def on_batch_end(batch, logs):
+            steps[0] += 1
+
+            if steps[0] % target_update_steps == 0:
+                target_model.set_weights(model.get_weights())
+
+        return tf.keras.callbacks.LambdaCallback(on_batch_end=on_batch_end)
 
     model_path = Path('./model/cost.h5')
 
     model = create_model() if not model_path.exists() else tf.keras.models.load_model(model_path)
-    model.fit_generator(create_generator(1000), steps_per_epoch=1000, epochs=100)
+
+    if not value_iteration:
+        model.fit_generator(create_generator(1000), steps_per_epoch=1000, epochs=100)
+    else:
+        target_model = tf.keras.models.clone_model(model)
+        target_model.set_weights(model.get_weights())
+
+        model.fit_generator(create_value_iteration_generator(target_model, 1000), steps_per_epoch=1000, epochs=100, callbacks=[update_target_model(target_model, model)])
 
     model_path.parent.mkdir(exist_ok=True)
     tf.keras.models.save_model(model, 'model/cost.h5')
@@ -80,4 +136,4 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    main('--value-iteration' in sys.argv)
@@ -0,0 +1,128 @@
+import json
+import numpy as np
+import os
+import socket
+import subprocess
+import sys
+
+from pathlib import *
+from random  import *
+from time    import *
+
+
+# localhostの複数のプロセスで、データ並列で学習します（tf.distribute.MultiWorkerMirroredStrategy）。
+# 各ワーカーは自分でスクランブルした学習データを作って、勾配はワーカー間でall-reduceします。
+# batch_sizeはレプリカあたりのバッチ・サイズです。distribute_datasets_from_functionで各レプリカにbatch_size個ずつ渡すので、
+# 全体のバッチ・サイズはbatch_size×レプリカ数になります。学習率もレプリカ数倍にします（最初のwarmup_epochsで徐々に上げます）。
+#
+# python train_distributed.py 8
+
+
+def get_free_ports(size):
+    sockets = tuple(socket.socket() for _ in range(size))
+
+    for s in sockets:
+        s.bind(('localhost', 0))
+
+    result = tuple(s.getsockname()[1] for s in sockets)
+
+    for s in sockets:
+        s.close()
+
+    return result
+
+
+def worker_main(index, worker_size, base_learning_rate, batch_size, steps_per_epoch, epochs, warmup_epochs):
+    import tensorflow as tf  # TF_CONFIGを設定した後でないとダメなので、ここでインポートします。
+    import train
+
+    tf.config.threading.set_intra_op_parallelism_threads(max(os.cpu_count() // worker_size, 1))  # ワーカー同士でコアを取り合わないようにします。
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+
+    strategy = tf.distribute.MultiWorkerMirroredStrategy()
+
+    seed(index * 1000003 + time_ns())  # ワーカーごとに違うデータを作ります。
+
+    model_path = Path('./model/cost.h5')
+
+    with strategy.scope():
+        model = train.create_model()
+
+        if model_path.exists():
+            model.set_weights(tf.keras.models.load_model(model_path).get_weights())
+
+        model.compile(optimizer=tf.keras.optimizers.Adam(base_learning_rate), loss='mean_squared_error', metrics=['mean_absolute_error'])
+
+    global_batch_size = batch_size * strategy.num_replicas_in_sync
+    worker_batch_size = global_batch_size // worker_size  # ワーカーごとのレプリカ数は同じなので、ワーカーあたりのバッチ・サイズです。
+
+    def create_dataset(input_context):
+        # 各ワーカーが自分で作ったデータを、そのままレプリカごとのバッチ・サイズで渡します（自動の分割はされません）。
+        per_replica_batch_size = input_context.get_per_replica_batch_size(global_batch_size)
+
+        def create_generator():
+            for xs, ys in train.create_generator(per_replica_batch_size):
+                yield xs.astype(np.float32), ys.astype(np.float32)
+
+        return tf.data.Dataset.from_generator(create_generator,
+                                              output_signature=(tf.TensorSpec(shape=(None, 3, 3, 6 * 6), dtype=tf.float32),
+                                                                tf.TensorSpec(shape=(None,),           dtype=tf.float32))).prefetch(2)
+
+    dataset = strategy.distribute_datasets_from_function(create_dataset)
+
+    def get_learning_rate(epoch, _):  # 全体のバッチ・サイズに合わせた線形スケーリング（ウォームアップ付き）。
+        return base_learning_rate * (1 + (global_batch_size / batch_size - 1) * min((epoch + 1) / warmup_epochs, 1))
+
+    class ThroughputCallback(tf.keras.callbacks.Callback):
+        def on_epoch_begin(self, epoch, logs=None):
+            self.starting_time = time()
+
+        def on_epoch_end(self, epoch, logs=None):
+            elapsed_time = time() - self.starting_time
+
+            # ワーカーごとのスループットです。遅いワーカーがいると、全体がそのワーカーに引きずられます。
+            print(f'worker {index}, epoch {epoch + 1}, batch {worker_batch_size}, {worker_batch_size * steps_per_epoch / elapsed_time:8.1f} samples/sec', flush=True)
+
+            if index == 0:  # 全体のスループットなので、チーフだけが表示します。
+                print(f'epoch {epoch + 1}, global batch {global_batch_size}, {global_batch_size * steps_per_epoch / elapsed_time:8.1f} samples/sec, loss {logs["loss"]:.4f}', flush=True)
+
+    model.fit(dataset,
+              steps_per_epoch=steps_per_epoch,
+              epochs=epochs,
+              verbose=2 if index == 0 else 0,
+              callbacks=[tf.keras.callbacks.LearningRateScheduler(get_learning_rate), ThroughputCallback()])
+
+    # 保存は全ワーカーで実行する必要があるので、チーフ以外は一時ファイルに保存します。
+    save_path = model_path if index == 0 else model_path.with_name(f'cost-worker-{index}.h5')
+
+    model_path.parent.mkdir(exist_ok=True)
+    tf.keras.models.save_model(model, str(save_path))
+
+    if index != 0:
+        save_path.unlink()
+
+    tf.keras.backend.clear_session()
+
+
+def main(worker_size=None, base_learning_rate=0.001, batch_size=1000, steps_per_epoch=1000, epochs=100, warmup_epochs=5):
+    worker_size = worker_size or os.cpu_count() // 4 or 1
+
+    addresses = tuple(f'localhost:{port}' for port in get_free_ports(worker_size))
+    processes = []
+
+    for index in range(worker_size):
+        env = dict(os.environ, TF_CONFIG=json.dumps({'cluster': {'worker': addresses}, 'task': {'type': 'worker', 'index': index}}))
+        arguments = map(str, (index, worker_size, base_learning_rate, batch_size, steps_per_epoch, epochs, warmup_epochs))
+
+        processes.append(subprocess.Popen((sys.executable, __file__, '--worker', *arguments), env=env))
+
+    for process in processes:
+        process.wait()
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['--worker']:
+        index, worker_size, base_learning_rate, batch_size, steps_per_epoch, epochs, warmup_epochs = sys.argv[2:]
+        worker_main(int(index), int(worker_size), float(base_learning_rate), int(batch_size), int(steps_per_epoch), int(epochs), int(warmup_epochs))
+    else:
+        main(*map(int, sys.argv[1:2]))
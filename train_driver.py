@@ -0,0 +1,166 @@
+import pickle
+import random
+import sys
+import tensorflow as tf
+import train
+
+from pathlib       import *
+from profiling     import *
+from queue         import *
+from replay_buffer import *
+from shutil        import *
+from threading     import *
+from time          import *
+
+
+# 中断しても続きから再開できる学習のドライバーです。
+# checkpoint_stepsバッチごとに、モデルとオプティマイザーの状態と学習のステップ数と乱数の状態をmodel/checkpointsに保存します。
+# 再実行すると、最新のチェックポイントから同じ乱数で続きを学習します。
+# 学習データはprefetch_sizeバッチ先までスレッドで生成しておいて、GPUでの学習と重ねます（fit_generatorのキューと同じ）。snapshot_epochsエポックごとに、cost-1024x4-1000x1000x0100.h5のような版付きのモデルを保存します。
+#
+# --hard-examplesを付けると、hard_example_mining.pyで溜めたmodel/replay-buffer.npzを、replay_ratioの割合で学習データに混ぜます。
+#
+# python train_driver.py [--value-iteration] [--mixed-precision] [--hard-examples]
+
+
+def load_model(model_path):
+    result = train.create_model()
+
+    if model_path.exists():
+        result.set_weights(tf.keras.models.load_model(model_path).get_weights())  # mixed precisionでも使えるように、重みだけ読み込みます。
+
+    return result
+
+
+def prefetch(generator, size):
+    # generatorを別スレッドで回して、(xs, ys, 生成直後の乱数の状態, 生成にかかった秒数)を返します。
+    # 乱数の状態をバッチごとに持っておくので、先読みしていても、学習済みのバッチの直後から再開できます。
+    queue   = Queue(size)
+    stopped = Event()
+
+    def run():
+        try:
+            while not stopped.is_set():
+                starting_time = perf_counter()
+                xs, ys = next(generator)
+                item   = xs, ys, random.getstate(), perf_counter() - starting_time
+
+                while not stopped.is_set():
+                    try:
+                        queue.put(item, timeout=0.1)
+                        break
+                    except Full:
+                        pass
+
+        except Exception as e:
+            queue.put(e)
+
+    thread = Thread(target=run, daemon=True)
+    thread.start()
+
+    try:
+        while True:
+            item = queue.get()
+
+            if isinstance(item, Exception):
+                raise item
+
+            yield item
+
+    finally:
+        stopped.set()
+        thread.join()
+
+
+def main(value_iteration=False, mixed_precision=False, batch_size=1000, steps_per_epoch=1000, epochs=1000, checkpoint_steps=100, snapshot_epochs=100, report_steps=10, target_update_steps=1000, hard_examples=False, replay_ratio=0.25, prefetch_size=4):
+    if value_iteration and hard_examples:  # value iterationのジェネレーターは、リプレイ・バッファーのサンプルを混ぜられません。
+        raise ValueError('hard_examples cannot be used with value_iteration.')
+
+    if mixed_precision:
+        tf.keras.mixed_precision.set_global_policy('mixed_float16')
+
+    model_path      = Path('./model/cost.h5')
+    checkpoint_path = Path('./model/checkpoints')
+
+    model        = load_model(model_path)
+    target_model = None
+
+    if value_iteration:
+        target_model = tf.keras.models.clone_model(model)  # cost.h5がなくても、modelと同じ重みから始めます。
+        target_model.set_weights(model.get_weights())
+
+    step               = tf.Variable(0, dtype=tf.int64)
+    checkpoint         = tf.train.Checkpoint(model=model, optimizer=model.optimizer, step=step)
+    checkpoint_manager = tf.train.CheckpointManager(checkpoint, str(checkpoint_path), max_to_keep=3)
+
+    if target_model:
+        checkpoint.target_model = target_model
+
+    if checkpoint_manager.latest_checkpoint:
+        checkpoint.restore(checkpoint_manager.latest_checkpoint)
+
+        with open(f'{checkpoint_manager.latest_checkpoint}.random', 'rb') as f:
+            random.setstate(pickle.load(f))
+
+        print(f'resumed from {checkpoint_manager.latest_checkpoint} (step {int(step)})')
+
+    replay_buffer = ReplayBuffer.load('./model/replay-buffer.npz') if hard_examples else None
+    generator     = train.create_value_iteration_generator(target_model, batch_size) if value_iteration else train.create_generator(batch_size, replay_buffer, replay_ratio)
+    batches       = prefetch(generator, prefetch_size)  # value iterationでは、先読みした分だけ古いtarget_modelで作ったバッチが混ざります。
+
+    generator_time = 0  # 生成スレッドでかかった時間
+    wait_time      = 0  # 学習が生成を待った時間
+    compute_time   = 0
+    reported_size  = 0
+
+    while int(step) < steps_per_epoch * epochs:
+        starting_time = perf_counter()
+        xs, ys, random_state, generated_time = next(batches)
+
+        received_time = perf_counter()
+
+        with trace('train'):
+            loss, mean_absolute_error = model.train_on_batch(xs, ys)
+
+        record_memory()
+
+        generator_time += generated_time
+        wait_time      += received_time - starting_time
+        compute_time   += perf_counter() - received_time
+        reported_size  += len(xs)
+
+        step.assign_add(1)
+
+        if value_iteration and int(step) % target_update_steps == 0:
+            target_model.set_weights(model.get_weights())
+
+        if int(step) % report_steps == 0:
+            print(f'epoch {(int(step) - 1) // steps_per_epoch + 1:4d}, step {(int(step) - 1) % steps_per_epoch + 1:4d}: loss {loss:.4f}, mae {mean_absolute_error:.4f}, '
+                  f'{reported_size / (wait_time + compute_time):8.1f} samples/sec (generator {generator_time:6.2f}s, wait {wait_time:6.2f}s, compute {compute_time:6.2f}s)')
+
+            generator_time = 0
+            wait_time      = 0
+            compute_time   = 0
+            reported_size  = 0
+
+        if int(step) % checkpoint_steps == 0:
+            with open(f'{checkpoint_manager.save(checkpoint_number=int(step))}.random', 'wb') as f:
+                pickle.dump(random_state, f)
+
+            for random_state_path in checkpoint_path.glob('*.random'):  # CheckpointManagerが消した古いチェックポイントの分を消します。
+                if str(random_state_path.with_suffix('')) not in checkpoint_manager.checkpoints:
+                    random_state_path.unlink()
+
+        if int(step) % (steps_per_epoch * snapshot_epochs) == 0:
+            tf.keras.models.save_model(model, str(model_path))
+            copy(str(model_path), str(model_path.with_name(f'cost-1024x4-{batch_size}x{steps_per_epoch}x{int(step) // steps_per_epoch:04d}.h5')))
+
+    batches.close()
+
+    tf.keras.models.save_model(model, str(model_path))
+
+    tf.keras.backend.clear_session()
+
+
+if __name__ == '__main__':
+    main('--value-iteration' in sys.argv, '--mixed-precision' in sys.argv, hard_examples='--hard-examples' in sys.argv)
@@ -0,0 +1,226 @@
+import numpy as np
+
+from game     import *
+from pathlib  import *
+from tempfile import *
+
+
+# 訪問済みの状態とそこまでのコストを保持するクラスです。状態は、pack_states()で16バイトのbytes（6進数24桁×2のビッグ・エンディアン）に詰めたキーで扱います。
+# タプルの状態（1状態約2KB）と違って辞書のエントリを含めても1状態100バイト程度なので、探索のキューでも同じキーを使えば、max_memory_sizeでメモリの使用量を抑えられます。
+# キーの大小関係は、元の状態のタプルの大小関係と同じです。
+# メモリ上の辞書が大きくなりすぎたら、状態を18バイト（6進数24桁×2）に詰め直してソートしたファイル（ラン）にはき出して、
+# memmapで参照します。ランが増えすぎたら、チャンクごとのk-wayマージで1つのランにまとめます（全体をメモリに読み込むことはありません）。
+# max_memory_sizeがNoneなら、ただの辞書として動きます。
+# メモリに持つのは、辞書とマージ中のチャンクだけです。A*のキューは、これとは別にメモリ上で増え続けます。
+
+UNKNOWN_COST = np.iinfo(np.uint16).max
+
+RUN_DTYPES = (('his', np.uint64), ('los', np.uint64), ('costs', np.uint16))
+
+_POWERS = 6 ** np.arange(len(GOAL_STATE) // 2 - 1, -1, -1, dtype=np.uint64)
+
+
+def _pack(states):
+    np_states = np.asarray(states, dtype=np.uint8).reshape(-1, len(GOAL_STATE)).astype(np.uint64)
+
+    return np_states[:, :len(_POWERS)] @ _POWERS, np_states[:, len(_POWERS):] @ _POWERS
+
+
+def _unpack(his, los):
+    def digits(xs):
+        return (xs[:, None] // _POWERS % 6).astype(np.uint8)
+
+    return np.concatenate((digits(his), digits(los)), axis=1)
+
+
+def _to_keys(his, los):
+    data = np.stack((his, los), axis=1).astype('>u8').tobytes()
+
+    return [data[i:i + 16] for i in range(0, len(data), 16)]
+
+
+def _from_keys(keys):
+    xs = np.frombuffer(b''.join(keys), dtype='>u8').reshape(-1, 2).astype(np.uint64)
+
+    return xs[:, 0], xs[:, 1]
+
+
+def pack_states(states):
+    return _to_keys(*_pack(states))
+
+
+def unpack_keys(keys):
+    return _unpack(*_from_keys(keys))
+
+
+def _sort(his, los, costs):
+    indexes = np.lexsort((costs, los, his))  # 同じ状態ならコストが小さいものが先頭に来ます。
+    his, los, costs = his[indexes], los[indexes], costs[indexes]
+
+    uniques = np.ones(len(his), dtype=bool)
+    uniques[1:] = (his[1:] != his[:-1]) | (los[1:] != los[:-1])
+
+    return his[uniques], los[uniques], costs[uniques]
+
+
+def _search(run, his, los):
+    run_his, run_los, run_costs = run
+
+    lefts  = np.searchsorted(run_his, his, 'left')
+    rights = np.searchsorted(run_his, his, 'right')
+
+    # hiが同じ範囲の中で、loを二分探索します。
+    ends = rights.copy()
+
+    while np.any(active := lefts < rights):
+        mids  = (lefts + rights) // 2
+        lowers = run_los[np.minimum(mids, len(run_los) - 1)] < los
+
+        lefts  = np.where(active &  lowers, mids + 1, lefts)
+        rights = np.where(active & ~lowers, mids,     rights)
+
+    indexes = np.minimum(lefts, len(run_los) - 1)
+    founds  = (lefts < ends) & (run_los[indexes] == los)
+
+    return np.where(founds, run_costs[indexes], UNKNOWN_COST)
+
+
+def _count_less_equal(his, los, hi, lo):
+    # ソート済みのhis、losの中で、(hi, lo)以下の要素の数を返します。
+    return int(np.searchsorted(his, hi, 'left') + np.count_nonzero((his == hi) & (los <= lo)))
+
+
+def _merge(runs, chunk_size):
+    # ソート済みのランを、chunk_sizeずつ読みながらマージして、重複を除いた(his, los, costs)のチャンクを順に返します。
+    positions = [0] * len(runs)
+
+    while True:
+        chunks = tuple(tuple(xs[position:position + chunk_size] for xs in run) for run, position in zip(runs, positions))
+
+        if not any(len(his) for his, _, _ in chunks):
+            break
+
+        # 最後まで読めていないランのチャンクの末尾のうち最小のものまでなら、どのランにもそれより小さい要素は残っていません。
+        # 同じ状態は必ず同じチャンクに入るので、チャンクの中で重複を除けば十分です。
+        boundaries = tuple((int(his[-1]), int(los[-1])) for (his, los, _), run, position in zip(chunks, runs, positions) if position + len(his) < len(run[0]))
+        boundary   = min(boundaries) if boundaries else None
+
+        sizes = tuple(len(his) if boundary is None else _count_less_equal(his, los, *boundary) for his, los, _ in chunks)
+
+        yield _sort(*(np.concatenate(tuple(chunk[i][:size] for chunk, size in zip(chunks, sizes))) for i in range(3)))
+
+        positions = [position + size for position, size in zip(positions, sizes)]
+
+
+def open_run(path):
+    return tuple(np.memmap(path.with_suffix(f'.{name}'), dtype=dtype, mode='r') for name, dtype in RUN_DTYPES)
+
+
+class VisitedStates:
+    def __init__(self, max_memory_size=None, max_run_size=8, directory=None):
+        self.max_memory_size = max_memory_size
+        self.max_run_size    = max_run_size
+
+        self.memory = {}
+        self.runs   = []
+
+        self.temporary_directory = TemporaryDirectory(prefix='visited-states-', dir=directory) if max_memory_size is not None else None
+        self.run_count           = 0
+
+    def get_costs(self, keys):
+        result = np.array(tuple(self.memory.get(key, UNKNOWN_COST) for key in keys), dtype=np.uint16)
+
+        if self.runs and len(result):
+            misses = np.flatnonzero(result == UNKNOWN_COST)  # メモリ上の値は、ラン上の値以下なので、ランを見るのはメモリにない場合だけで大丈夫。
+
+            if len(misses):
+                his, los = _from_keys(tuple(keys[i] for i in misses))
+
+                result[misses] = np.min(tuple(_search(run, his, los) for run in self.runs), axis=0)
+
+        return result
+
+    def update(self, keys_to_costs):
+        self.memory.update(keys_to_costs)
+
+        if self.max_memory_size is not None and len(self.memory) > self.max_memory_size:
+            self.spill()
+
+    def spill(self):
+        if not self.memory:
+            return
+
+        his, los = _from_keys(tuple(self.memory.keys()))
+        costs    = np.array(tuple(self.memory.values()), dtype=np.uint16)
+
+        self.memory = {}
+        self.write_run(his, los, costs)
+
+        if len(self.runs) > self.max_run_size:
+            self.merge()
+
+    def new_run_path(self):
+        path = Path(self.temporary_directory.name) / f'{self.run_count:08d}'
+        self.run_count += 1
+
+        return path
+
+    def write_run(self, his, los, costs):
+        self.write_run_chunks((_sort(his, los, costs),))
+
+    def write_run_chunks(self, chunks):
+        # ソート済みで重複のない(his, los, costs)のチャンクを、順にファイルに追記して1つのランにします。
+        path  = self.new_run_path()
+        files = tuple(path.with_suffix(f'.{name}').open('wb') for name, _ in RUN_DTYPES)
+
+        try:
+            for chunk in chunks:
+                for f, xs, (_, dtype) in zip(files, chunk, RUN_DTYPES):
+                    f.write(np.ascontiguousarray(xs, dtype=dtype).tobytes())
+
+        finally:
+            for f in files:
+                f.close()
+
+        self.add_run(path)
+
+    def add_run(self, path):
+        if path.with_suffix('.his').stat().st_size == 0:  # 空のファイルはmemmapできないので、捨てます。
+            for name, _ in RUN_DTYPES:
+                path.with_suffix(f'.{name}').unlink()
+
+            return
+
+        self.runs.append(open_run(path))
+
+    def merge(self, chunk_size=1 << 20):
+        runs  = self.runs
+        paths = tuple(Path(xs.filename) for run in runs for xs in run)
+
+        self.runs = []
+        self.write_run_chunks(_merge(runs, chunk_size))
+
+        del runs  # memmapを閉じてから、ファイルを削除します。
+
+        for path in paths:
+            path.unlink()
+
+    def get_sorted_runs(self):
+        # メモリ上の辞書も詰め直してソートしたランにして、すべてのランを返します。チェックポイントの保存用です。
+        his, los = _from_keys(tuple(self.memory.keys()))
+        costs    = np.array(tuple(self.memory.values()), dtype=np.uint16)
+
+        return (_sort(his, los, costs),) + tuple(self.runs)
+
+    def load_run_chunks(self, chunks):
+        # get_sorted_runs()で保存したランを、チャンクごとに読み込みます。
+        if self.max_memory_size is None:
+            for his, los, costs in chunks:
+                for key, cost in zip(_to_keys(his, los), costs.tolist()):  # ランの間で重複した状態は、コストが小さい方を残します。
+                    if self.memory.get(key, UNKNOWN_COST) > cost:
+                        self.memory[key] = cost
+        else:
+            self.write_run_chunks(chunks)
+
+            if len(self.runs) > self.max_run_size:
+                self.merge()